@@ -0,0 +1,55 @@
+"""Initial schema: users, tasks
+
+The tables exactly as earlier versions created them on startup, so existing
+databases can be stamped at this revision and upgraded from there.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+TASK_STATUSES = ("pending", "in_progress", "completed")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("custom_username", sa.String(50)),
+        sa.Column("email", sa.String(100)),
+        sa.Column("hashed_password", sa.String(255)),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("role", sa.Enum("admin", "staff", name="user_roles"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_custom_username", "users", ["custom_username"], unique=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "tasks",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(100)),
+        sa.Column("description", sa.String(255), nullable=True),
+        sa.Column("status", sa.Enum(*TASK_STATUSES, name="task_status"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("assignee_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("assigned_by_id", sa.Integer(), sa.ForeignKey("users.id")),
+    )
+    op.create_index("ix_tasks_id", "tasks", ["id"])
+    op.create_index("ix_tasks_title", "tasks", ["title"])
+    op.create_index("ix_tasks_description", "tasks", ["description"])
+
+
+def downgrade() -> None:
+    op.drop_table("tasks")
+    op.drop_table("users")
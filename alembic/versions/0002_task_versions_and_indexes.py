@@ -0,0 +1,74 @@
+"""Task versions, listing indexes and full-text search
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# SQLite stand-in for the MySQL FULLTEXT index (see app.models.task)
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+    "title, description, content='tasks', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+    "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    # Index the tasks that already exist
+    "INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')",
+)
+
+LISTING_INDEXES = (
+    ("ix_tasks_assignee_id_id", ["assignee_id", "id"]),
+    ("ix_tasks_status_id", ["status", "id"]),
+    ("ix_tasks_assignee_id_status_id", ["assignee_id", "status", "id"]),
+    ("ix_tasks_assigned_by_id_id", ["assigned_by_id", "id"]),
+    ("ix_tasks_created_at", ["created_at"]),
+    ("ix_tasks_updated_at", ["updated_at"]),
+)
+
+
+def upgrade() -> None:
+    # Existing tasks start at version 1
+    op.add_column("tasks", sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+    for name, columns in LISTING_INDEXES:
+        op.create_index(name, "tasks", columns)
+    # Never used by a query; search goes through the full-text index instead
+    op.drop_index("ix_tasks_description", table_name="tasks")
+
+    dialect = op.get_bind().dialect.name
+    if dialect == "mysql":
+        op.create_index(
+            "ix_tasks_title_description_fulltext", "tasks", ["title", "description"],
+            mysql_prefix="FULLTEXT",
+        )
+    elif dialect == "sqlite":
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "mysql":
+        op.drop_index("ix_tasks_title_description_fulltext", table_name="tasks")
+    elif dialect == "sqlite":
+        for trigger in ("tasks_fts_ai", "tasks_fts_ad", "tasks_fts_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS tasks_fts")
+    op.create_index("ix_tasks_description", "tasks", ["description"])
+    for name, _ in reversed(LISTING_INDEXES):
+        op.drop_index(name, table_name="tasks")
+    with op.batch_alter_table("tasks") as batch_op:
+        batch_op.drop_column("version")
@@ -0,0 +1,36 @@
+"""Task counters, filled from the existing tasks
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Earlier versions created missing tables on startup, so it may exist already
+    if not sa.inspect(op.get_bind()).has_table("task_counters"):
+        op.create_table(
+            "task_counters",
+            sa.Column("status", sa.String(20), primary_key=True),
+            sa.Column("assignee_id", sa.Integer(), primary_key=True, autoincrement=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+        )
+    # Same as `python -m app.cli rebuild-task-stats`; tasks without an assignee count under 0
+    op.execute("DELETE FROM task_counters")
+    op.execute(
+        "INSERT INTO task_counters (status, assignee_id, count) "
+        "SELECT status, COALESCE(assignee_id, 0), COUNT(*) FROM tasks "
+        "GROUP BY status, COALESCE(assignee_id, 0)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("task_counters")
@@ -0,0 +1,37 @@
+"""Archive table for completed tasks
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+TASK_STATUSES = ("pending", "in_progress", "completed")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tasks_archive",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("title", sa.String(100)),
+        sa.Column("description", sa.String(255), nullable=True),
+        sa.Column("status", sa.Enum(*TASK_STATUSES, name="task_status"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True)),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("assignee_id", sa.Integer()),
+        sa.Column("assigned_by_id", sa.Integer()),
+        sa.Column("archived_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_tasks_archive_assignee_id_id", "tasks_archive", ["assignee_id", "id"])
+
+
+def downgrade() -> None:
+    op.drop_table("tasks_archive")
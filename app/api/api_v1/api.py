@@ -1,7 +1,9 @@
 from fastapi import APIRouter
-from app.api.api_v1.endpoints import users, tasks, login
+from app.api.api_v1.endpoints import admin, batch, users, tasks, login
 
 api_router = APIRouter()
 api_router.include_router(login.router, tags=["login"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(tasks.router, prefix="/tasks", tags=["tasks"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
+api_router.include_router(batch.router, tags=["batch"])
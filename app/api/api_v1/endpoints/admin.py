@@ -0,0 +1,56 @@
+from typing import Any
+from anyio import to_thread
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+from app import schemas
+from app.api import deps
+from app.core import jobs, metrics
+from app.core.config import settings
+from app.crud import crud_job
+from app.db.session import engine
+
+router = APIRouter()
+
+@router.get("/pool", response_model=schemas.PoolStats)
+async def read_pool_stats(
+    current_admin: schemas.Principal = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Live connection pool and threadpool usage of the worker serving this request. (Admin only)
+    """
+    pool = engine.pool
+    limiter = to_thread.current_default_thread_limiter()
+    checkouts, waited = metrics.pool_checkout_wait.totals()
+    stats = schemas.PoolStats(
+        pool_class=type(pool).__name__,
+        pre_ping=settings.DB_POOL_PRE_PING,
+        checkouts=int(checkouts),
+        checkout_wait_seconds=waited,
+        threadpool_tokens=int(limiter.total_tokens),
+        threadpool_busy=limiter.borrowed_tokens,
+        workers=settings.WEB_CONCURRENCY,
+    )
+    if isinstance(pool, QueuePool):
+        stats.pool_size = pool.size()
+        stats.max_overflow = pool._max_overflow
+        stats.timeout = pool.timeout()
+        stats.checked_out = pool.checkedout()
+        stats.checked_in = pool.checkedin()
+        # QueuePool counts overflow from -pool_size until the pool is full
+        stats.overflow = max(pool.overflow(), 0)
+        stats.max_connections_all_workers = settings.WEB_CONCURRENCY * (pool.size() + pool._max_overflow)
+    return stats
+
+@router.get("/jobs", response_model=schemas.JobQueueStats)
+def read_job_stats(
+    db: Session = Depends(deps.get_db),
+    current_admin: schemas.Principal = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Depth of the job outbox: pending, due and dead jobs. (Admin only)
+    """
+    return schemas.JobQueueStats(
+        **crud_job.get_stats(db), workers=jobs.pool.workers if jobs.pool is not None else 0
+    )
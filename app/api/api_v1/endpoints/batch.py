@@ -0,0 +1,167 @@
+import logging
+from typing import Any, Dict, List, Tuple
+
+import anyio
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.api import deps
+from app.core.config import settings
+from app.core.serialization import ORJSON_OPTIONS, ORJSONResponse
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+BATCH_METHODS = ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE")
+# Streaming and upload endpoints, and the batch endpoint itself
+UNBATCHABLE_PATHS = ("/batch", "/tasks/stream", "/tasks/export", "/tasks/import")
+# Headers the batch sets itself
+RESERVED_HEADERS = ("authorization", "host", "content-length", "content-type")
+
+def _groups(items: List[schemas.BatchRequestItem]) -> List[List[Tuple[int, schemas.BatchRequestItem]]]:
+    """Split the batch into steps run in order: runs of consecutive reads, or single writes."""
+    groups: List[List[Tuple[int, schemas.BatchRequestItem]]] = []
+    for index, item in enumerate(items):
+        is_read = item.method in deps.READ_ONLY_METHODS
+        if is_read and groups and groups[-1][-1][1].method in deps.READ_ONLY_METHODS:
+            groups[-1].append((index, item))
+        else:
+            groups.append([(index, item)])
+    return groups
+
+async def _dispatch(request: Request, item: schemas.BatchRequestItem, batch: deps.BatchContext) -> Dict[str, Any]:
+    """
+    Run one sub-request through the application, as if it had arrived on its
+    own, and collect its response. Dependencies find `batch` in the scope.
+    """
+    path, _, query = item.path.partition("?")
+    full_path = request.scope.get("root_path", "") + settings.API_V1_STR + path
+    body = orjson.dumps(item.body) if item.body is not None else b""
+    headers = [
+        (name.lower().encode("latin-1"), value.encode("latin-1"))
+        for name, value in item.headers.items()
+        if name.lower() not in RESERVED_HEADERS
+    ]
+    headers.append((b"authorization", request.headers["authorization"].encode("latin-1")))
+    if body:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    scope = {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": request.scope.get("http_version", "1.1"),
+        "method": item.method,
+        "scheme": request.url.scheme,
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": request.scope.get("root_path", ""),
+        "path": full_path,
+        "raw_path": full_path.encode(),
+        "query_string": query.encode(),
+        "headers": headers,
+        "state": dict(request.scope.get("state") or {}),
+        "batch": batch,
+    }
+    received = False
+
+    async def receive() -> dict:
+        nonlocal received
+        if received:
+            # The sub-request never disconnects; its response is collected in full
+            await anyio.sleep_forever()
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    response: Dict[str, Any] = {"status": 500, "headers": {}, "body": None}
+    chunks: List[bytes] = []
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {
+                name.decode("latin-1"): value.decode("latin-1")
+                for name, value in message.get("headers", [])
+                if name.lower() != b"content-length"
+            }
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await request.scope["app"](scope, receive, send)
+    except Exception:
+        # Already answered with a 500 by the server error middleware, or not at all
+        logger.exception("Batch sub-request %s %s failed", item.method, item.path)
+        if not chunks:
+            response["headers"] = {"content-type": "application/json"}
+            chunks.append(b'{"detail":"Internal Server Error"}')
+    content = b"".join(chunks)
+    if content:
+        if response["headers"].get("content-type", "").startswith("application/json"):
+            # Embedded as is, without decoding and re-encoding
+            response["body"] = orjson.Fragment(content)
+        else:
+            response["body"] = content.decode("utf-8", errors="replace")
+    return response
+
+@router.post("/batch", response_model=schemas.BatchResponse)
+async def run_batch(
+    request: Request,
+    batch_in: schemas.BatchRequest,
+    db: Session = Depends(deps.get_db),
+    token_data: schemas.TokenPayload = Depends(deps.get_token_payload),
+    current_user: schemas.Principal = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Run several API requests in one round trip and return their responses in
+    order. Each entry names a `method`, a `path` under /api/v1 (with query
+    string), and optionally a JSON `body` and extra `headers`.
+
+    The caller is authenticated once, for all of them. Requests run in order
+    on one database session, except that consecutive GETs run concurrently,
+    each with its own session. A failing request doesn't stop the others;
+    its status is reported in its response.
+    """
+    items = batch_in.requests
+    if len(items) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=400, detail=f"A batch holds at most {settings.BATCH_MAX_REQUESTS} requests"
+        )
+    for index, item in enumerate(items):
+        item.method = item.method.upper()
+        path = item.path.partition("?")[0].rstrip("/")
+        if item.method not in BATCH_METHODS:
+            raise HTTPException(status_code=400, detail=f"Request {index}: unsupported method {item.method}")
+        if path in UNBATCHABLE_PATHS:
+            raise HTTPException(status_code=400, detail=f"Request {index}: {path} cannot be batched")
+
+    shared = deps.BatchContext(token_data=token_data, principal=current_user, db=db)
+    parallel = deps.BatchContext(token_data=token_data, principal=current_user)
+    responses: List[Dict[str, Any]] = [None] * len(items)
+
+    async def run(index: int, item: schemas.BatchRequestItem, batch: deps.BatchContext) -> None:
+        responses[index] = await _dispatch(request, item, batch)
+        if batch.db is not None:
+            # Start the next request with an empty identity map, as in a session
+            # of its own, and drop whatever a failed request left uncommitted
+            if responses[index]["status"] >= 500:
+                await run_in_threadpool(batch.db.rollback)
+            batch.db.expunge_all()
+
+    for group in _groups(items):
+        concurrent = len(group) > 1 and settings.BATCH_READ_CONCURRENCY > 1
+        limiter = anyio.CapacityLimiter(settings.BATCH_READ_CONCURRENCY if concurrent else 1)
+
+        async def limited(index: int, item: schemas.BatchRequestItem) -> None:
+            async with limiter:
+                await run(index, item, parallel if concurrent else shared)
+
+        # Each request also runs in a task of its own, so context variables it
+        # sets (per-request metrics) don't leak into the batch or its neighbours
+        async with anyio.create_task_group() as tasks:
+            for index, item in group:
+                tasks.start_soon(limited, index, item)
+
+    return ORJSONResponse(orjson.dumps({"responses": responses}, option=ORJSON_OPTIONS))
@@ -1,36 +1,118 @@
-from datetime import timedelta
-from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from app import schemas
 from app.api import deps
 from app.core import security
+from app.core.clock import utcnow
 from app.core.config import settings
-from app.crud import crud_user
+from app.core.ratelimit import login_throttle
+from app.core.revocation import denylist
+from app.crud import crud_token, crud_user
+from app.db.replicas import stick_to_primary
 
 router = APIRouter()
 
+def _access_token(user: Any, jti: str) -> str:
+    claims = {"role": user.role, "active": user.is_active} if settings.TOKEN_EMBED_CLAIMS else None
+    return security.create_access_token(
+        user.id,
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        claims=claims,
+        jti=jti,
+    )
+
+def _new_access_token_id() -> Tuple[str, datetime]:
+    """A jti and its token's expiry (naive UTC), to record with the refresh token."""
+    expires_at = utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return security.new_token_id(), expires_at
+
 @router.post("/login/access-token", response_model=schemas.Token)
 def login_access_token(
-    db: Session = Depends(deps.get_db), form_data: OAuth2PasswordRequestForm = Depends()
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    form_data: OAuth2PasswordRequestForm = Depends(),
 ) -> Any:
     """
-    OAuth2 compatible token login, get an access token for future requests
+    OAuth2 compatible token login, get an access token for future requests,
+    and a refresh token to get new ones from /login/refresh-token.
+
+    Too many attempts from one address, or failures for one email, are
+    answered with `429 Too Many Requests` and a `Retry-After` header.
     """
+    client_ip = request.client.host if request.client else "unknown"
+    email_key = form_data.username.strip().lower()
+    retry_after = login_throttle.before_attempt(client_ip, email_key)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, please retry later",
+            headers={"Retry-After": str(retry_after)},
+        )
     user = crud_user.authenticate(
         db, email=form_data.username, password=form_data.password
     )
     if not user:
+        login_throttle.failed(email_key)
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     elif not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    login_throttle.succeeded(email_key)
+    # A just-registered user may not have reached the replicas yet
+    stick_to_primary(user.id)
+    jti, access_expires_at = _new_access_token_id()
+    return {
+        "access_token": _access_token(user, jti),
+        "token_type": "bearer",
+        "refresh_token": crud_token.issue_refresh_token(db, user.id, jti, access_expires_at),
+    }
+
+@router.post("/login/refresh-token", response_model=schemas.Token)
+def refresh_access_token(
+    body: schemas.RefreshTokenRequest,
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """
+    Exchange a refresh token for a new access token and refresh token, without
+    the password. Each refresh token works once: presenting a used one again
+    revokes the whole session, including its access tokens.
+    """
+    jti, access_expires_at = _new_access_token_id()
+    user_id, refresh_token, revoked = crud_token.rotate_refresh_token(
+        db, body.refresh_token, jti, access_expires_at
+    )
+    denylist.add(revoked)
+    if user_id is None:
+        raise HTTPException(status_code=400, detail="Invalid refresh token")
+    user = crud_user.get_principal(db, user_id=user_id)
+    if not user or not user.is_active:
+        denylist.add(crud_token.revoke_family(db, crud_token.get_family_id(db, refresh_token)))
+        raise HTTPException(status_code=400, detail="Inactive user")
     return {
-        "access_token": security.create_access_token(
-            user.id, expires_delta=access_token_expires
-        ),
+        "access_token": _access_token(user, jti),
         "token_type": "bearer",
+        "refresh_token": refresh_token,
     }
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    body: Optional[schemas.LogoutRequest] = None,
+    db: Session = Depends(deps.get_db),
+    token_data: schemas.TokenPayload = Depends(deps.get_token_payload),
+):
+    """
+    Revoke the access token used for this request and, if given, the session
+    of `refresh_token`. Other workers refuse the revoked access tokens within
+    REVOCATION_SYNC_SECONDS.
+    """
+    if token_data.jti and token_data.exp:
+        expires_at = datetime.fromtimestamp(token_data.exp, timezone.utc).replace(tzinfo=None)
+        denylist.add(crud_token.revoke_access_token(db, token_data.jti, expires_at))
+    if body is not None and body.refresh_token:
+        family_id = crud_token.get_family_id(db, body.refresh_token)
+        if family_id is not None:
+            denylist.add(crud_token.revoke_family(db, family_id))
@@ -1,58 +1,336 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status
+import hashlib
+from typing import Any, List, Optional, Sequence, Tuple
+import orjson
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app import models, schemas
+from app import schemas
 from app.api import deps
-from app.crud import crud_task, crud_user
+from app.core.config import settings
+from app.core.events import broker, format_sse
+from app.core.etag import etag_matches, make_etag
+from app.core.export import EXPORT_FORMATS, encode_rows
+from app.core.importer import detect_format
+from app.core.pagination import encode_cursor
+from app.core.response_cache import response_cache
+from app.core.serialization import ORJSONResponse, TASK_FIELDS, dump_many, dump_one
+from app.crud import crud_task, crud_task_import, crud_task_stats
+from app.db.replicas import on_replica
+from app.db.session import SessionLocal
 
 router = APIRouter()
 
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+def _check_expand(expand: Sequence[str], include_archived: bool) -> None:
+    if expand and include_archived:
+        # Archived tasks keep their user ids but have no relationships to load
+        raise HTTPException(status_code=400, detail="expand cannot be combined with include_archived")
+
+def _body_digest(body: bytes) -> str:
+    # Expanded users aren't versioned, so ETags of expanded responses cover the body itself
+    return hashlib.sha1(body).hexdigest()
+
 @router.get("/", response_model=List[schemas.TaskResponse])
 def read_tasks(
+    request: Request,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: models.User = Depends(deps.get_current_user),
+    after_id: Optional[int] = Depends(deps.get_after_id),
+    filters: schemas.TaskFilter = Depends(deps.get_task_filter),
+    include_archived: bool = False,
+    fields: Optional[Tuple[str, ...]] = Depends(deps.get_task_fields),
+    expand: Tuple[str, ...] = Depends(deps.get_task_expand),
+    current_user: schemas.Principal = Depends(deps.get_current_user),
 ) -> Any:
     """
     Retrieve tasks. Admins see all, Staff see assigned.
+
+    Filter by status, assignee, creator and created/updated ranges, or search
+    title and description with `q`. Pass the `X-Next-Cursor` response header
+    back as `cursor` to fetch the next page. Responses carry an ETag; send it
+    back in `If-None-Match` to get `304 Not Modified` while the page is unchanged.
+    Admin pages are served from the response cache until a task changes.
+    Archived tasks are only listed with `include_archived=true`.
+
+    `fields=title,status` returns only those fields (plus `id`), and
+    `expand=assignee,assigned_by` embeds those users' id, username and email.
     """
-    if current_user.role == "admin":
-        tasks = crud_task.get_multi(db, skip=skip, limit=limit)
+    _check_expand(expand, include_archived)
+    assignee_id = None if current_user.role == "admin" else current_user.id
+    etag_scope = ("tasks", assignee_id, request.url.query)
+    if_none_match = request.headers.get("if-none-match")
+    cache_key = None
+    if response_cache is not None and current_user.role == "admin":
+        tables = ("tasks", "tasks_archive") if include_archived else ("tasks",)
+        if expand:
+            tables += ("users",)
+        cache_key = response_cache.key(
+            "tasks", tables, current_user.role, sorted(request.query_params.multi_items())
+        )
+        cached = response_cache.get("tasks", cache_key)
+        if cached is not None:
+            body, headers = cached
+            if if_none_match and etag_matches(if_none_match, headers["ETag"]):
+                return _not_modified(headers["ETag"])
+            return ORJSONResponse(body, headers=headers)
+    if if_none_match and not include_archived and not expand:
+        page_fingerprint = crud_task.get_page_fingerprint(
+            db, skip=skip, limit=limit, after_id=after_id, filters=filters, assignee_id=assignee_id
+        )
+        etag = make_etag(*etag_scope, *page_fingerprint)
+        if etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+    if (fields is not None and not include_archived) or expand:
+        tasks = crud_task.get_page(
+            db, skip=skip, limit=limit, after_id=after_id, filters=filters, assignee_id=assignee_id,
+            fields=fields, expand=expand,
+        )
     else:
-        tasks = crud_task.get_multi_by_assignee(db, assignee_id=current_user.id, skip=skip, limit=limit)
-    return tasks
+        tasks = crud_task.get_page_rows(
+            db, skip=skip, limit=limit, after_id=after_id, filters=filters, assignee_id=assignee_id,
+            include_archived=include_archived,
+        )
+    body = dump_many(tasks, fields or TASK_FIELDS, expand)
+    headers = {"ETag": make_etag(
+        *etag_scope, *crud_task.fingerprint(tasks), *([_body_digest(body)] if expand else [])
+    )}
+    if (include_archived or expand) and etag_matches(if_none_match, headers["ETag"]):
+        return _not_modified(headers["ETag"])
+    if tasks and len(tasks) == limit:
+        headers["X-Next-Cursor"] = encode_cursor(id=tasks[-1].id)
+    # A replica may lag the versions in the key; only pages read from the primary are cached
+    if cache_key is not None and not on_replica(db):
+        response_cache.set(cache_key, body, headers)
+    return ORJSONResponse(body, headers=headers)
 
 @router.post("/", response_model=schemas.TaskResponse, status_code=status.HTTP_201_CREATED)
 def create_task(
     *,
     db: Session = Depends(deps.get_db),
     task_in: schemas.TaskCreate,
-    current_admin: models.User = Depends(deps.get_current_admin),
+    current_admin: schemas.Principal = Depends(deps.get_current_admin),
 ) -> Any:
     """
     Create new task. (Admin only)
     """
-    user = crud_user.get_users(db) # Verify assignee exists? Let FK handle it or optionally verify.
-    return crud_task.create_assigned_task(db, obj_in=task_in, assigned_by_id=current_admin.id)
+    task = crud_task.create_assigned_task(db, obj_in=task_in, assigned_by_id=current_admin.id)
+    return ORJSONResponse(dump_one(task, TASK_FIELDS), status_code=status.HTTP_201_CREATED)
+
+def _check_bulk_size(items: list) -> None:
+    if len(items) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.BULK_MAX_ITEMS} items per bulk request",
+        )
+
+@router.post("/bulk", response_model=List[schemas.TaskBulkResult])
+def create_tasks_bulk(
+    *,
+    db: Session = Depends(deps.get_db),
+    tasks_in: List[schemas.TaskCreate],
+    current_admin: schemas.Principal = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Create many tasks in one transaction. (Admin only)
+
+    Returns one result per item, in request order.
+    """
+    _check_bulk_size(tasks_in)
+    return crud_task.create_bulk(db, objs_in=tasks_in, assigned_by_id=current_admin.id)
+
+@router.patch("/bulk", response_model=List[schemas.TaskBulkResult])
+def update_tasks_bulk(
+    *,
+    db: Session = Depends(deps.get_db),
+    tasks_in: List[schemas.TaskBulkUpdate],
+    current_admin: schemas.Principal = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Update many tasks in one transaction. (Admin only)
+
+    Returns one result per item, in request order.
+    """
+    _check_bulk_size(tasks_in)
+    return crud_task.update_bulk(db, objs_in=tasks_in)
+
+@router.get("/stats", response_model=schemas.TaskStats)
+def read_task_stats(
+    db: Session = Depends(deps.get_db),
+    current_user: schemas.Principal = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Task counts per status and per assignee. Admins see all, Staff see their own.
+    """
+    assignee_id = None if current_user.role == "admin" else current_user.id
+    return crud_task_stats.get_stats(db, assignee_id=assignee_id)
+
+def _import_progress(file: UploadFile, fmt: str, assigned_by_id: int, chunk_size: int):
+    # The stream outlives the request's dependencies, so it owns its session
+    db = SessionLocal()
+    try:
+        results = crud_task_import.iter_import(
+            db, file.file, fmt, assigned_by_id=assigned_by_id, chunk_size=chunk_size,
+            max_errors=settings.IMPORT_MAX_ERRORS,
+        )
+        for result in results:
+            progress = result.model_dump(include={"rows", "inserted", "failed", "chunks"})
+            yield orjson.dumps({"progress": progress}) + b"\n"
+        yield orjson.dumps({"result": result.model_dump()}) + b"\n"
+    finally:
+        db.close()
+
+@router.post("/import", response_model=schemas.TaskImportResult)
+def import_tasks(
+    *,
+    db: Session = Depends(deps.get_db),
+    file: UploadFile = File(...),
+    import_format: Optional[str] = Query(None, alias="format", pattern="^(ndjson|csv)$"),
+    chunk_size: int = Query(settings.IMPORT_CHUNK_SIZE, ge=1, le=settings.BULK_MAX_ITEMS),
+    progress: bool = False,
+    current_admin: schemas.Principal = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Import tasks from a CSV or NDJSON upload. (Admin only)
+
+    Columns/keys match task creation; the assignee may be given as `assignee_id`
+    or as `assignee` (email or username). Rows are inserted in chunks, one
+    commit per chunk, and invalid rows are reported by line number.
+    With `progress=true` the response is NDJSON instead: a `{"progress": ...}`
+    line with the running counts after every committed chunk, then
+    `{"result": ...}` with the final result.
+    """
+    fmt = import_format or detect_format(file.filename, file.content_type)
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="Cannot detect file format, pass ?format=csv|ndjson")
+    if progress:
+        # Authentication is done; the stream opens its own session
+        db.close()
+        return StreamingResponse(
+            _import_progress(file, fmt, current_admin.id, chunk_size), media_type="application/x-ndjson"
+        )
+    return crud_task_import.import_tasks(
+        db,
+        file.file,
+        fmt,
+        assigned_by_id=current_admin.id,
+        chunk_size=chunk_size,
+        max_errors=settings.IMPORT_MAX_ERRORS,
+    )
+
+def _export_chunks(
+    fmt: str, filters: schemas.TaskFilter, assignee_id: Optional[int], include_archived: bool
+):
+    # The stream outlives the request's dependencies, so it owns its session
+    db = SessionLocal()
+    try:
+        rows = crud_task.iter_rows(
+            db, filters=filters, assignee_id=assignee_id, batch_size=settings.EXPORT_BATCH_SIZE,
+            include_archived=include_archived,
+        )
+        columns = [column.key for column in crud_task.EXPORT_COLUMNS]
+        yield from encode_rows(rows, columns, fmt, chunk_rows=settings.EXPORT_BATCH_SIZE)
+    finally:
+        db.close()
+
+@router.get("/export")
+def export_tasks(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    filters: schemas.TaskFilter = Depends(deps.get_task_filter),
+    include_archived: bool = False,
+    current_user: schemas.Principal = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Stream tasks as NDJSON or CSV. Accepts the same filters as the task listing.
+    Admins export all tasks, Staff their own. With `include_archived=true`,
+    archived tasks follow the live ones.
+    """
+    assignee_id = None if current_user.role == "admin" else current_user.id
+    return StreamingResponse(
+        _export_chunks(export_format, filters, assignee_id, include_archived),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{export_format}"'},
+    )
+
+async def _event_stream(request: Request, subscription):
+    with subscription:
+        yield b"retry: 3000\n\n"
+        while not await request.is_disconnected():
+            events = await subscription.get(timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+            if not events:
+                yield b": keep-alive\n\n"
+            for event in events:
+                yield format_sse(event)
+
+@router.get("/stream")
+async def stream_task_events(
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    current_user: schemas.Principal = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Server-Sent Events feed of task changes (`created`, `updated`, `deleted`,
+    `archived`).
+    Admins receive every event, Staff events for tasks assigned to them
+    (including tasks reassigned away). A `resync` event means events were
+    dropped and the client should refetch its task list.
+    """
+    # Authentication is done; don't hold a pooled connection for the life of the stream
+    db.close()
+    subscription = broker.subscribe(None if current_user.role == "admin" else current_user.id)
+    return StreamingResponse(
+        _event_stream(request, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.get("/{task_id}", response_model=schemas.TaskResponse)
 def read_task(
     *,
+    request: Request,
     db: Session = Depends(deps.get_db),
     task_id: int,
-    current_user: models.User = Depends(deps.get_current_user),
+    include_archived: bool = False,
+    fields: Optional[Tuple[str, ...]] = Depends(deps.get_task_fields),
+    expand: Tuple[str, ...] = Depends(deps.get_task_expand),
+    current_user: schemas.Principal = Depends(deps.get_current_user),
 ) -> Any:
     """
-    Get task by ID.
+    Get task by ID. Supports `If-None-Match` with the returned ETag. Archived
+    tasks are only found with `include_archived=true`. Accepts the same
+    `fields` and `expand` parameters as the task listing.
     """
-    task = crud_task.get_task(db, task_id=task_id)
+    _check_expand(expand, include_archived)
+    etag_scope = ("task", task_id, *(fields or ()))
+    if_none_match = request.headers.get("if-none-match")
+    # Expanded responses depend on more than the task's version
+    precheck = if_none_match and not expand
+    current = crud_task.get_task_fingerprint(db, task_id=task_id) if precheck else None
+    if current:
+        # Check permissions and freshness from two columns before loading the row
+        if current_user.role != "admin" and current.assignee_id != current_user.id:
+            raise HTTPException(status_code=400, detail="Not enough permissions")
+        etag = make_etag(*etag_scope, current.version)
+        if etag_matches(if_none_match, etag):
+            return _not_modified(etag)
+    elif precheck and not include_archived:
+        raise HTTPException(status_code=404, detail="Task not found")
+    task = crud_task.get_task(db, task_id=task_id, fields=fields, expand=expand)
+    if not task and include_archived:
+        task = crud_task.get_archived_task(db, task_id=task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     if current_user.role != "admin" and task.assignee_id != current_user.id:
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    return task
+    body = dump_one(task, fields or TASK_FIELDS, expand)
+    etag = make_etag(*etag_scope, task.version, *([_body_digest(body)] if expand else []))
+    if etag_matches(if_none_match, etag):
+        # Archived and expanded tasks skip the pre-check above
+        return _not_modified(etag)
+    return ORJSONResponse(body, headers={"ETag": etag})
 
 @router.put("/{task_id}", response_model=schemas.TaskResponse)
 def update_task(
@@ -60,10 +338,13 @@ def update_task(
     db: Session = Depends(deps.get_db),
     task_id: int,
     task_in: schemas.TaskUpdate,
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: schemas.Principal = Depends(deps.get_current_user),
 ) -> Any:
     """
     Update a task. Staff can only update status. Admins can update all fields.
+
+    Send the task's `version` to make the update conditional: if someone else
+    changed the task since, nothing is written and `409 Conflict` is returned.
     """
     task = crud_task.get_task(db, task_id=task_id)
     if not task:
@@ -73,21 +354,30 @@ def update_task(
         if task.assignee_id != current_user.id:
             raise HTTPException(status_code=400, detail="Not enough permissions")
         # Ensure staff can only update status
-        task_in = schemas.TaskUpdate(status=task_in.status)
+        task_in = schemas.TaskUpdate(status=task_in.status, version=task_in.version)
 
-    return crud_task.update_task(db, db_obj=task, obj_in=task_in)
+    try:
+        task = crud_task.update_task(db, db_obj=task, obj_in=task_in)
+    except crud_task.VersionConflict:
+        raise HTTPException(status_code=409, detail="Task was modified by another request")
+    return ORJSONResponse(dump_one(task, TASK_FIELDS))
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_task(
     *,
     db: Session = Depends(deps.get_db),
     task_id: int,
-    current_admin: models.User = Depends(deps.get_current_admin),
+    version: Optional[int] = None,
+    current_admin: schemas.Principal = Depends(deps.get_current_admin),
 ):
     """
     Delete a task. (Admin only)
+
+    With `?version=`, only that version is deleted; `409 Conflict` otherwise.
     """
-    task = crud_task.get_task(db, task_id=task_id)
-    if not task:
+    try:
+        deleted = crud_task.remove_task(db, task_id=task_id, version=version)
+    except crud_task.VersionConflict:
+        raise HTTPException(status_code=409, detail="Task was modified by another request")
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    crud_task.remove_task(db, task_id=task_id)
@@ -1,10 +1,14 @@
-from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
-from app import models, schemas
+from app import schemas
 from app.api import deps
+from app.core.pagination import encode_cursor
+from app.core.response_cache import response_cache
+from app.core.serialization import ORJSONResponse, USER_FIELDS, dump_many, dump_one
 from app.crud import crud_user
+from app.db.replicas import on_replica
 
 router = APIRouter()
 
@@ -29,26 +33,45 @@ def register_user(
             status_code=400,
             detail="Email already registered",
         )
-    return crud_user.create_user(db, obj_in=user_in)
+    user = crud_user.create_user(db, obj_in=user_in)
+    return ORJSONResponse(dump_one(user, USER_FIELDS), status_code=status.HTTP_201_CREATED)
 
 @router.get("/me", response_model=schemas.UserResponse)
 def get_me(
-    current_user: models.User = Depends(deps.get_current_user),
+    current_user: schemas.Principal = Depends(deps.get_current_user),
 ) -> Any:
     """
     Get current user.
     """
-    return current_user
+    return ORJSONResponse(dump_one(current_user, USER_FIELDS))
 
 @router.get("/", response_model=list[schemas.UserResponse])
 def read_users(
+    request: Request,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
-    current_admin: models.User = Depends(deps.get_current_admin),
+    after_id: Optional[int] = Depends(deps.get_after_id),
+    current_admin: schemas.Principal = Depends(deps.get_current_admin),
 ) -> Any:
     """
     Retrieve users. (Admin only)
     """
-    users = crud_user.get_users(db, skip=skip, limit=limit)
-    return users
+    cache_key = None
+    if response_cache is not None:
+        cache_key = response_cache.key(
+            "users", ("users",), current_admin.role, sorted(request.query_params.multi_items())
+        )
+        cached = response_cache.get("users", cache_key)
+        if cached is not None:
+            body, headers = cached
+            return ORJSONResponse(body, headers=headers)
+    users = crud_user.get_users(db, skip=skip, limit=limit, after_id=after_id)
+    headers = {}
+    if users and len(users) == limit:
+        headers["X-Next-Cursor"] = encode_cursor(id=users[-1].id)
+    body = dump_many(users, USER_FIELDS)
+    # A replica may lag the versions in the key; only pages read from the primary are cached
+    if cache_key is not None and not on_replica(db):
+        response_cache.set(cache_key, body, headers)
+    return ORJSONResponse(body, headers=headers)
@@ -1,29 +1,141 @@
-from typing import Generator
-from fastapi import Depends, HTTPException, status
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncGenerator, Generator, Optional, Tuple
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app import models
-from app.db.session import SessionLocal
+from app import schemas
+from app.db.replicas import reads_from_primary, replicas
+from app.db.session import AsyncSessionLocal, SessionLocal, get_async_engine
 from app.core.config import settings
 from app.core import security
+from app.core.pagination import decode_cursor
+from app.core.revocation import denylist
+from app.core.serialization import TASK_EXPANSIONS, TASK_FIELDS
+from app.crud import crud_user, crud_user_async
+from app.models.task import TASK_STATUSES
 from app.schemas.token import TokenPayload
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
 )
 
-def get_db() -> Generator:
+READ_ONLY_METHODS = ("GET", "HEAD")
+
+@dataclass
+class BatchContext:
+    """
+    What the sub-requests of one POST /batch share (see endpoints.batch),
+    found in their ASGI scope under "batch": the caller, authenticated once,
+    and the batch's session.
+    """
+    token_data: TokenPayload
+    principal: schemas.Principal
+    # None for reads running in parallel; a Session can't be used concurrently
+    db: Optional[Session] = None
+
+def get_token_subject(request: Request) -> Optional[str]:
+    """
+    The bearer token's subject, unverified. Only used to route reads; the
+    token is still verified by get_token_payload before anything is served.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
     try:
+        return jwt.get_unverified_claims(token).get("sub")
+    except JWTError:
+        return None
+
+def get_db(request: Request, subject: Optional[str] = Depends(get_token_subject)) -> Generator:
+    """
+    Session for the request: a replica for reads (GET/HEAD) when replicas are
+    configured and the caller hasn't written recently, the primary otherwise.
+    """
+    batch = request.scope.get("batch")
+    if batch is not None and batch.db is not None:
+        # Owned and closed by the batch
+        yield batch.db
+        return
+    db = None
+    if replicas is not None and request.method in READ_ONLY_METHODS and not reads_from_primary(subject):
+        db = replicas.session()
+    if db is None:
         db = SessionLocal()
+        db.info["subject"] = subject
+    try:
         yield db
     finally:
         db.close()
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
-) -> models.User:
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal(bind=get_async_engine()) as db:
+        yield db
+
+def get_after_id(cursor: Optional[str] = None) -> Optional[int]:
+    """Resolve the opaque `cursor` query parameter into the id to seek past."""
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)["id"]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _names(value: str, allowed: Tuple[str, ...], what: str) -> Tuple[str, ...]:
+    names = tuple(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown {what}: {', '.join(unknown)} (allowed: {', '.join(allowed)})",
+        )
+    return names
+
+def get_task_fields(
+    fields: Optional[str] = Query(None, description="Comma-separated task fields to return"),
+) -> Optional[Tuple[str, ...]]:
+    """Sparse fieldset from `fields=`; None means every field. `id` is always included."""
+    if fields is None:
+        return None
+    return tuple(dict.fromkeys(("id", *_names(fields, TASK_FIELDS, "fields"))))
+
+def get_task_expand(
+    expand: Optional[str] = Query(None, description="Relationships to embed: assignee, assigned_by"),
+) -> Tuple[str, ...]:
+    return _names(expand, TASK_EXPANSIONS, "expansions") if expand else ()
+
+def get_task_filter(
+    task_status: Optional[str] = Query(None, alias="status"),
+    assignee_id: Optional[int] = None,
+    assigned_by_id: Optional[int] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    updated_after: Optional[datetime] = None,
+    updated_before: Optional[datetime] = None,
+    q: Optional[str] = Query(None, min_length=1, max_length=200),
+) -> schemas.TaskFilter:
+    """Collect the task listing filters from the query string."""
+    if task_status is not None and task_status not in TASK_STATUSES:
+        raise HTTPException(status_code=400, detail="Invalid status")
+    return schemas.TaskFilter(
+        status=task_status,
+        assignee_id=assignee_id,
+        assigned_by_id=assigned_by_id,
+        created_after=created_after,
+        created_before=created_before,
+        updated_after=updated_after,
+        updated_before=updated_before,
+        q=q,
+    )
+
+def get_token_payload(token: str = Depends(reusable_oauth2), request: Request = None) -> TokenPayload:
+    # request is None when called outside a request (scripts, benchmarks)
+    batch = request.scope.get("batch") if request is not None else None
+    if batch is not None:
+        return batch.token_data
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
@@ -34,16 +146,66 @@ def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = db.query(models.User).filter(models.User.id == token_data.sub).first()
-    if not user:
+    # In-memory filter; the database is only asked when the token id is in it
+    if token_data.jti and denylist.is_revoked(token_data.jti):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Token has been revoked",
+        )
+    return token_data
+
+def _check_principal(principal: Optional[schemas.Principal]) -> schemas.Principal:
+    if not principal:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    if not principal.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return principal
 
-def get_current_admin(
-    current_user: models.User = Depends(get_current_user),
-) -> models.User:
-    if current_user.role != "admin":
+def _principal_from_claims(token_data: TokenPayload) -> Optional[schemas.Principal]:
+    # Tokens issued with TOKEN_EMBED_CLAIMS carry enough to authorize without the DB
+    if token_data.role is None:
+        return None
+    return schemas.Principal(
+        id=token_data.sub, role=token_data.role, is_active=bool(token_data.active)
+    )
+
+def _require_admin(principal: schemas.Principal) -> schemas.Principal:
+    if principal.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Not enough privileges"
         )
-    return current_user
+    return principal
+
+def get_current_user(
+    request: Request,
+    db: Session = Depends(get_db),
+    token_data: TokenPayload = Depends(get_token_payload),
+) -> schemas.Principal:
+    batch = request.scope.get("batch")
+    if batch is not None:
+        return batch.principal
+    return _check_principal(crud_user.get_principal(db, user_id=token_data.sub))
+
+def get_current_admin(
+    request: Request,
+    db: Session = Depends(get_db),
+    token_data: TokenPayload = Depends(get_token_payload),
+) -> schemas.Principal:
+    batch = request.scope.get("batch")
+    principal = batch.principal if batch is not None else _principal_from_claims(token_data)
+    if principal is None:
+        principal = crud_user.get_principal(db, user_id=token_data.sub)
+    return _require_admin(_check_principal(principal))
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db), token_data: TokenPayload = Depends(get_token_payload)
+) -> schemas.Principal:
+    return _check_principal(await crud_user_async.get_principal(db, user_id=token_data.sub))
+
+async def get_current_admin_async(
+    db: AsyncSession = Depends(get_async_db), token_data: TokenPayload = Depends(get_token_payload)
+) -> schemas.Principal:
+    principal = _principal_from_claims(token_data)
+    if principal is None:
+        principal = await crud_user_async.get_principal(db, user_id=token_data.sub)
+    return _require_admin(_check_principal(principal))
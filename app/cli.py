@@ -0,0 +1,108 @@
+"""
+Operational commands, e.g.:
+
+    python -m app.cli migrate
+    python -m app.cli schema-version
+    python -m app.cli rebuild-task-stats
+    python -m app.cli archive-tasks
+    python -m app.cli run-jobs
+"""
+import argparse
+import signal
+
+from app.core import jobs
+from app.core.archiver import archiver_from_settings
+from app.core.config import settings
+from app.crud import crud_task_stats
+from app.db import schema
+from app.db.session import SessionLocal, engine
+
+
+def migrate(args: argparse.Namespace) -> None:
+    schema.upgrade(engine, args.revision)
+    print(f"Database schema at revision {schema.current_revision(engine)}")
+
+
+def schema_version(args: argparse.Namespace) -> None:
+    current, head = schema.current_revision(engine), schema.head_revision()
+    print(f"database: {current or 'none'}\napplication: {head}")
+    if current != head:
+        raise SystemExit(1)
+
+
+def rebuild_task_stats(args: argparse.Namespace) -> None:
+    db = SessionLocal()
+    try:
+        rows = crud_task_stats.rebuild(db)
+    finally:
+        db.close()
+    print(f"Rebuilt task counters ({rows} rows)")
+
+
+def _warn_local_response_cache() -> None:
+    if settings.RESPONSE_CACHE_ENABLED and settings.RESPONSE_CACHE_BACKEND != "redis":
+        print(
+            "Note: the API's local response cache does not see writes from this process; "
+            f"admin listings may lag them by up to {settings.RESPONSE_CACHE_TTL_SECONDS}s"
+        )
+
+
+def archive_tasks(args: argparse.Namespace) -> None:
+    _warn_local_response_cache()
+    archiver = archiver_from_settings(SessionLocal)
+    if args.after_days is not None:
+        archiver.after_days = args.after_days
+    print(f"Archived {archiver.run_once()} completed tasks")
+
+
+def run_jobs(args: argparse.Namespace) -> None:
+    pool = jobs.pool_from_settings(SessionLocal)
+    pool.workers = args.workers or pool.workers or 1
+    pool.start()
+    print(f"Running {pool.workers} job workers; Ctrl+C to stop")
+    try:
+        signal.pause()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    upgrade = commands.add_parser("migrate", help="Apply pending database migrations")
+    upgrade.add_argument("revision", nargs="?", default="head", help="target revision (default: head)")
+    upgrade.set_defaults(func=migrate)
+
+    version = commands.add_parser(
+        "schema-version", help="Show the database and application schema revisions (exit 1 if they differ)"
+    )
+    version.set_defaults(func=schema_version)
+
+    rebuild = commands.add_parser(
+        "rebuild-task-stats", help="Recompute the task_counters table from tasks"
+    )
+    rebuild.set_defaults(func=rebuild_task_stats)
+
+    archive = commands.add_parser(
+        "archive-tasks", help="Move old completed tasks to tasks_archive now (same batching as the archiver)"
+    )
+    archive.add_argument(
+        "--after-days", type=float, help="archive tasks unchanged for this many days (default: ARCHIVE_AFTER_DAYS)"
+    )
+    archive.set_defaults(func=archive_tasks)
+
+    run = commands.add_parser(
+        "run-jobs", help="Run job workers in the foreground (for deployments with JOBS_WORKERS=0 in the API)"
+    )
+    run.add_argument("--workers", type=int, help="worker threads (default: JOBS_WORKERS, at least 1)")
+    run.set_defaults(func=run_jobs)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
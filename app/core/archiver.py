@@ -0,0 +1,95 @@
+"""
+Background archiving of old completed tasks.
+
+Each run moves completed tasks older than ARCHIVE_AFTER_DAYS to tasks_archive
+in transactions of at most ARCHIVE_BATCH_SIZE rows, sleeping
+ARCHIVE_BATCH_PAUSE_SECONDS between them so request traffic gets the hot
+table (and, on SQLite, the write lock) back between batches. Runs repeat every
+ARCHIVE_INTERVAL_SECONDS.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import CounterMetric, register
+from app.crud import crud_task_archive
+
+logger = logging.getLogger(__name__)
+
+tasks_archived = register(CounterMetric(
+    "tasks_archived_total", "Completed tasks moved from tasks to tasks_archive"
+))
+
+
+class TaskArchiver:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        after_days: float,
+        batch_size: int,
+        pause: float,
+        interval: float,
+    ):
+        self.session_factory = session_factory
+        self.after_days = after_days
+        self.batch_size = batch_size
+        self.pause = pause
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> int:
+        """Archive everything currently old enough, batch by batch. Returns the number of tasks moved."""
+        before = crud_task_archive.cutoff(self.after_days)
+        total = 0
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            db = self.session_factory()
+            try:
+                moved = crud_task_archive.archive_batch(db, before, self.batch_size)
+            finally:
+                db.close()
+            total += moved
+            tasks_archived.inc(moved)
+            logger.debug("Archived %d tasks in %.3fs", moved, time.perf_counter() - started)
+            if moved < self.batch_size:
+                break
+            self._stop.wait(self.pause)
+        return total
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                moved = self.run_once()
+                if moved:
+                    logger.info("Archived %d completed tasks", moved)
+            except Exception:
+                logger.exception("Task archiving failed; retrying in %ss", self.interval)
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="task-archiver", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        """Stop after the batch in flight, if any."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def archiver_from_settings(session_factory: Callable[[], Session]) -> TaskArchiver:
+    return TaskArchiver(
+        session_factory,
+        after_days=settings.ARCHIVE_AFTER_DAYS,
+        batch_size=settings.ARCHIVE_BATCH_SIZE,
+        pause=settings.ARCHIVE_BATCH_PAUSE_SECONDS,
+        interval=settings.ARCHIVE_INTERVAL_SECONDS,
+    )
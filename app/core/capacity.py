@@ -0,0 +1,64 @@
+"""
+Connection capacity planning.
+
+Every worker process owns its own pool, so the database sees up to
+workers * (pool_size + max_overflow) connections. plan_pool() splits a total
+connection budget across workers; resolve_pool() combines that with any
+explicitly configured values.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+# SQLAlchemy's QueuePool defaults, used when neither explicit values nor a budget are set
+DEFAULT_POOL_SIZE = 5
+DEFAULT_MAX_OVERFLOW = 10
+
+
+@dataclass(frozen=True)
+class PoolPlan:
+    pool_size: int
+    max_overflow: int
+    # Threads for sync endpoints and dependencies; None keeps anyio's default (40)
+    threadpool_tokens: Optional[int]
+
+    @property
+    def max_connections(self) -> int:
+        return self.pool_size + self.max_overflow
+
+
+def plan_pool(max_connections: int, workers: int, overflow_ratio: float = 0.2) -> PoolPlan:
+    """
+    Per-worker pool for a total budget of `max_connections` shared by `workers`
+    processes. A share (`overflow_ratio`) of each worker's connections is kept
+    as overflow so idle workers don't hold them open. Sync request threads are
+    capped at the worker's connection count: a thread that could only wait for
+    a connection is better left queued in front of the threadpool.
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    per_worker = max_connections // workers
+    if per_worker < 1:
+        raise ValueError(
+            f"A budget of {max_connections} connections cannot give each of {workers} workers one"
+        )
+    max_overflow = int(per_worker * overflow_ratio)
+    return PoolPlan(
+        pool_size=per_worker - max_overflow,
+        max_overflow=max_overflow,
+        threadpool_tokens=per_worker,
+    )
+
+
+def resolve_pool(settings) -> PoolPlan:
+    """Explicit DB_POOL_SIZE / DB_MAX_OVERFLOW / THREADPOOL_TOKENS win over the budget plan."""
+    if settings.DB_MAX_CONNECTIONS:
+        derived = plan_pool(settings.DB_MAX_CONNECTIONS, settings.WEB_CONCURRENCY)
+    else:
+        derived = PoolPlan(DEFAULT_POOL_SIZE, DEFAULT_MAX_OVERFLOW, None)
+    return PoolPlan(
+        pool_size=derived.pool_size if settings.DB_POOL_SIZE is None else settings.DB_POOL_SIZE,
+        max_overflow=derived.max_overflow if settings.DB_MAX_OVERFLOW is None else settings.DB_MAX_OVERFLOW,
+        threadpool_tokens=(
+            derived.threadpool_tokens if settings.THREADPOOL_TOKENS is None else settings.THREADPOOL_TOKENS
+        ),
+    )
@@ -0,0 +1,10 @@
+from datetime import datetime, timezone
+
+
+def utcnow() -> datetime:
+    """
+    The current time as naive UTC, the form every timestamp the app writes or
+    compares against is stored in on all backends. Set from Python rather
+    than the database's NOW(), which follows the session time zone on MySQL.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
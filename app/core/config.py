@@ -1,11 +1,128 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Comma-separated read replicas for GET requests (see app.db.replicas). A user's
+    # reads go to the primary for REPLICA_STICKY_SECONDS after they write, and a
+    # failing replica is skipped for REPLICA_RETRY_SECONDS. With several workers,
+    # REPLICA_STICKY_BACKEND=redis lets every worker see who wrote recently.
+    DATABASE_REPLICA_URLS: Optional[str] = None
+    REPLICA_STICKY_SECONDS: float = 5
+    REPLICA_STICKY_BACKEND: str = "memory"
+    REPLICA_STICKY_REDIS_URL: str = "redis://localhost:6379/0"
+    REPLICA_RETRY_SECONDS: float = 30
+    # Defaults to DATABASE_URL with its driver swapped for the async one (aiomysql/aiosqlite)
+    ASYNC_DATABASE_URL: Optional[str] = None
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Refresh tokens rotate on every use; reusing one revokes its whole session
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # Revoked access tokens are mirrored per worker in a Bloom filter, synced from
+    # the database every REVOCATION_SYNC_SECONDS and rebuilt (dropping expired
+    # entries) every REVOCATION_REBUILD_SECONDS
+    REVOCATION_SYNC_SECONDS: float = 5
+    REVOCATION_REBUILD_SECONDS: float = 3600
+    # Each sync re-reads revocations this far back from the newest one seen, so
+    # one committed late (up to this long after its insert) is still picked up
+    REVOCATION_SYNC_MARGIN_SECONDS: float = 60
+    REVOCATION_FILTER_CAPACITY: int = 100000
+    REVOCATION_FILTER_ERROR_RATE: float = 0.001
     API_V1_STR: str = "/api/v1"
+    # Startup schema handling: "check" refuses to start unless the database is at the
+    # newest migration, "upgrade" applies pending migrations first, "off" skips both
+    SCHEMA_MODE: str = "check"
+    # Connection pool of each worker. Unset size/overflow/tokens are derived from the
+    # total DB_MAX_CONNECTIONS budget split across WEB_CONCURRENCY workers
+    # (app.core.capacity), or fall back to SQLAlchemy's 5 + 10 and anyio's 40 threads.
+    DB_POOL_SIZE: Optional[int] = None
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 3600
+    DB_MAX_CONNECTIONS: int = 0
+    WEB_CONCURRENCY: int = 1
+    THREADPOOL_TOKENS: Optional[int] = None
+    # Liveness check on checkout: "always" (a round trip per checkout), "idle" (only
+    # connections unused for DB_POOL_PRE_PING_IDLE_SECONDS) or "never"
+    DB_POOL_PRE_PING: str = "idle"
+    DB_POOL_PRE_PING_IDLE_SECONDS: int = 30
+    # Upper bound on items per /tasks/bulk request (written as one multi-row statement)
+    BULK_MAX_ITEMS: int = 1000
+    # /tasks/import commits one multi-row INSERT per chunk and reports at most this many row errors
+    IMPORT_CHUNK_SIZE: int = 500
+    IMPORT_MAX_ERRORS: int = 1000
+    # Rows fetched per server-side cursor batch (and per response chunk) by /tasks/export
+    EXPORT_BATCH_SIZE: int = 1000
+    # bcrypt runs in a dedicated process pool (0 workers = inline in the request thread).
+    # Logins beyond workers + queue size (and beyond a quarter of the sync request
+    # threads, which wait for the result) are rejected with 503 instead of queueing.
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+    # Changing the cost rehashes each password on its owner's next successful login
+    BCRYPT_ROUNDS: int = 12
+    # Login throttling: every attempt counts against the client IP, failures against
+    # the email. "memory" counts per worker; use "redis" with several workers.
+    LOGIN_RATE_LIMIT_BACKEND: str = "memory"
+    LOGIN_RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    LOGIN_IP_LIMIT: int = 30
+    LOGIN_IP_WINDOW_SECONDS: float = 60
+    LOGIN_EMAIL_FAILURE_LIMIT: int = 5
+    LOGIN_EMAIL_WINDOW_SECONDS: float = 300
+    # Unknown emails are remembered (skipping the lookup) with the redis backend only
+    LOGIN_NEGATIVE_CACHE_TTL_SECONDS: float = 300
+    # Prometheus metrics at /metrics; requests repeating one SQL statement at least
+    # N_PLUS_ONE_THRESHOLD times are logged and counted as likely N+1 queries (0 disables)
+    METRICS_ENABLED: bool = True
+    N_PLUS_ONE_THRESHOLD: int = 10
+    # Authenticated principals are cached per worker to skip the users lookup
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    # POST /batch: sub-requests per batch, and how many consecutive GETs may run
+    # at once (each with its own session; 1 runs everything on the batch's session)
+    BATCH_MAX_REQUESTS: int = 20
+    BATCH_READ_CONCURRENCY: int = 4
+    # Embed role/active claims in access tokens so admin checks need no DB access.
+    # Role changes then only take effect once outstanding tokens expire.
+    TOKEN_EMBED_CLAIMS: bool = False
+    # Serialized admin task/user listings, invalidated by per-table versions that
+    # every write bumps. "local" is per worker, so the cache stays off when
+    # WEB_CONCURRENCY > 1, and writes from `python -m app.cli` only show up once
+    # entries expire; "redis" is shared by all processes.
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_BACKEND: str = "local"
+    RESPONSE_CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RESPONSE_CACHE_TTL_SECONDS: int = 300
+    # Task change feed (/tasks/stream): "memory" fans out within one worker, "redis"
+    # across workers. Subscribers further behind than the queue size are told to resync.
+    EVENTS_BACKEND: str = "memory"
+    EVENTS_REDIS_URL: str = "redis://localhost:6379/0"
+    EVENTS_CHANNEL: str = "tasks"
+    EVENTS_QUEUE_SIZE: int = 256
+    EVENTS_HEARTBEAT_SECONDS: int = 15
+    # Completed tasks unchanged for ARCHIVE_AFTER_DAYS move to tasks_archive in
+    # batches, pausing between batches so the hot table is never locked for long.
+    # Enable in one worker only (or run `python -m app.cli archive-tasks` from cron).
+    ARCHIVE_ENABLED: bool = False
+    ARCHIVE_AFTER_DAYS: float = 90
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_BATCH_PAUSE_SECONDS: float = 0.5
+    ARCHIVE_INTERVAL_SECONDS: float = 3600
+    # Outbox of post-commit side effects, run by JOBS_WORKERS threads per worker
+    # process (0 runs none here; use `python -m app.cli run-jobs` elsewhere).
+    # Failed jobs retry with exponential backoff until JOBS_MAX_ATTEMPTS.
+    JOBS_WORKERS: int = 2
+    JOBS_BATCH_SIZE: int = 20
+    JOBS_POLL_SECONDS: float = 1
+    JOBS_LEASE_SECONDS: float = 300
+    JOBS_MAX_ATTEMPTS: int = 8
+    JOBS_BACKOFF_BASE_SECONDS: float = 2
+    JOBS_BACKOFF_MAX_SECONDS: float = 600
+    # POST every task change to this URL (as a job, after commit)
+    TASK_WEBHOOK_URL: Optional[str] = None
+    TASK_WEBHOOK_SECRET: Optional[str] = None
+    TASK_WEBHOOK_TIMEOUT_SECONDS: float = 5
 
     class Config:
         env_file = ".env"
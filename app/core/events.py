@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import orjson
+
+from app.core.config import settings
+from app.core.serialization import ORJSON_OPTIONS, TASK_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Task change feed. crud_task publishes an event after each committed write;
+# /tasks/stream subscribers receive the events they may see through a bounded
+# per-subscriber queue. A subscriber that falls behind loses its oldest events
+# and is sent a single "resync" event telling it to refetch.
+#
+# Event shape:
+#   {"type": "created" | "updated" | "deleted" | "archived", "id": 1, "status": "pending",
+#    "assignee_id": 2, "previous_assignee_id": 3 | null, "task": {...} | null}
+# "task" is the full task for single-row writes and null for bulk writes.
+
+Deliver = Callable[[List[dict]], None]
+
+
+def task_event(
+    kind: str,
+    task_id: int,
+    status: str,
+    assignee_id: int,
+    previous_assignee_id: Optional[int] = None,
+    task: Any = None,
+) -> dict:
+    return {
+        "type": kind,
+        "id": task_id,
+        "status": status,
+        "assignee_id": assignee_id,
+        "previous_assignee_id": previous_assignee_id,
+        "task": {field: getattr(task, field, None) for field in TASK_FIELDS} if task is not None else None,
+    }
+
+
+class InMemoryBackend:
+    """Fan-out within the current process only (single worker, tests)."""
+
+    def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    def publish(self, events: List[dict]) -> None:
+        self._deliver(events)
+
+    def close(self) -> None:
+        pass
+
+
+class RedisBackend:
+    """
+    Fan-out across workers through a Redis pub/sub channel. Every worker,
+    including the publishing one, delivers events as they come back from Redis.
+    """
+
+    def __init__(self, url: str, channel: str):
+        import redis  # optional dependency, only needed for this backend
+
+        self._client = redis.Redis.from_url(url)
+        self._channel = channel
+        self._pubsub = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, deliver: Deliver) -> None:
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(self._channel)
+
+        def listen() -> None:
+            for message in self._pubsub.listen():
+                try:
+                    deliver(orjson.loads(message["data"]))
+                except Exception:
+                    logger.exception("Dropping malformed task event from %s", self._channel)
+
+        self._thread = threading.Thread(target=listen, name="task-events", daemon=True)
+        self._thread.start()
+
+    def publish(self, events: List[dict]) -> None:
+        self._client.publish(self._channel, orjson.dumps(events, option=ORJSON_OPTIONS))
+
+    def close(self) -> None:
+        if self._pubsub is not None:
+            self._pubsub.close()
+
+
+class Subscription:
+    """Bounded event queue for one stream, filled from any thread and drained on its event loop."""
+
+    def __init__(self, broker: "EventBroker", user_id: Optional[int], maxsize: int):
+        self.user_id = user_id
+        self._broker = broker
+        self._queue: deque = deque(maxlen=maxsize)
+        self._lock = threading.Lock()
+        self._overflowed = False
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+
+    def wants(self, event: dict) -> bool:
+        return self.user_id is None or self.user_id in (event["assignee_id"], event["previous_assignee_id"])
+
+    def push(self, event: dict) -> None:
+        with self._lock:
+            if len(self._queue) == self._queue.maxlen:
+                self._overflowed = True
+            self._queue.append(event)
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            # Event loop already closed; the stream is gone
+            pass
+
+    async def get(self, timeout: float) -> List[dict]:
+        """Wait up to `timeout` seconds and return the queued events (possibly none)."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self._ready.clear()
+        with self._lock:
+            events = list(self._queue)
+            self._queue.clear()
+            if self._overflowed:
+                self._overflowed = False
+                events = [{"type": "resync"}]
+        return events
+
+    def close(self) -> None:
+        self._broker.unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class EventBroker:
+    def __init__(self, backend_factory: Callable[[], Any], queue_size: int):
+        self._backend_factory = backend_factory
+        self._backend = None
+        self._queue_size = queue_size
+        self._subscribers: set = set()
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        # Created on first use so importing crud modules never connects anywhere
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    backend = self._backend_factory()
+                    backend.start(self._deliver)
+                    self._backend = backend
+        return self._backend
+
+    def subscribe(self, user_id: Optional[int]) -> Subscription:
+        """Subscribe to the events for tasks assigned to `user_id` (None: all tasks)."""
+        self.backend
+        subscription = Subscription(self, user_id, self._queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, events: Sequence[dict]) -> None:
+        if not events:
+            return
+        try:
+            self.backend.publish(list(events))
+        except Exception:
+            # The write is already committed; a lost notification must not fail it
+            logger.exception("Failed to publish %d task events", len(events))
+
+    def _deliver(self, events: List[dict]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            for event in events:
+                if subscription.wants(event):
+                    subscription.push(event)
+
+    def close(self) -> None:
+        with self._lock:
+            backend, self._backend = self._backend, None
+        if backend is not None:
+            backend.close()
+
+
+def _backend_from_settings():
+    if settings.EVENTS_BACKEND == "redis":
+        return RedisBackend(settings.EVENTS_REDIS_URL, settings.EVENTS_CHANNEL)
+    return InMemoryBackend()
+
+
+def format_sse(event: Dict[str, Any]) -> bytes:
+    return b"event: " + event["type"].encode() + b"\ndata: " + orjson.dumps(event, option=ORJSON_OPTIONS) + b"\n\n"
+
+
+broker = EventBroker(_backend_from_settings, settings.EVENTS_QUEUE_SIZE)
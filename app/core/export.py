@@ -0,0 +1,47 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterable, Iterator, Sequence
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def encode_rows(
+    rows: Iterable[Sequence], columns: Sequence[str], fmt: str, chunk_rows: int = 1000
+) -> Iterator[bytes]:
+    """
+    Encode rows as NDJSON or CSV, yielding one bytes chunk per `chunk_rows`
+    rows so memory stays bounded regardless of how many rows are exported.
+    """
+    buffer = io.StringIO()
+    writer = None
+    if fmt == "csv":
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+    pending = 0
+    for row in rows:
+        if writer is not None:
+            writer.writerow(
+                value.isoformat() if isinstance(value, datetime) else value for value in row
+            )
+        else:
+            buffer.write(json.dumps(dict(zip(columns, row)), default=_json_default))
+            buffer.write("\n")
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
@@ -0,0 +1,101 @@
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Callable, Optional, Tuple
+
+from passlib.context import CryptContext
+
+
+class HashingPoolBusy(Exception):
+    """Raised when the password hashing queue is full; callers should retry later."""
+
+
+@lru_cache
+def get_crypt_context(rounds: int) -> CryptContext:
+    # Hashes with a different cost are reported by verify_and_update for rehashing
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+# The two functions below run inside the pool's worker processes
+
+def _hash(secret: str, rounds: int) -> str:
+    return get_crypt_context(rounds).hash(secret)
+
+
+def _verify_and_update(secret: str, hashed: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return get_crypt_context(rounds).verify_and_update(secret, hashed)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated process pool so it never competes with request
+    threads for the GIL. At most `workers + queue_size` operations may be in
+    flight; beyond that HashingPoolBusy is raised immediately. With `workers=0`
+    hashing runs inline in the calling thread.
+
+    Each operation in flight holds the calling request thread while it waits,
+    so start() also caps them at a quarter of the threads serving sync
+    endpoints, leaving the rest for everything else during a login burst.
+    """
+
+    def __init__(self, workers: int, queue_size: int, rounds: int):
+        self.workers = workers
+        self.rounds = rounds
+        self.max_in_flight = max(workers + queue_size, 1)
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def start(self, request_threads: int) -> None:
+        """Start the worker processes and leave most of the `request_threads` to other requests."""
+        self.max_in_flight = min(self.max_in_flight, max(request_threads // 4, 1))
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        if self.workers > 0:
+            self._get_executor()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # By now the app runs background threads (denylist sync, jobs,
+                    # archiver); forking a multi-threaded process can deadlock
+                    if "forkserver" in multiprocessing.get_all_start_methods():
+                        context = multiprocessing.get_context("forkserver")
+                        # Workers fork from a server that already imported passlib and bcrypt
+                        context.set_forkserver_preload([__name__])
+                    else:
+                        context = multiprocessing.get_context("spawn")
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=context,
+                        initializer=get_crypt_context,
+                        initargs=(self.rounds,),
+                    )
+        return self._executor
+
+    def _run(self, fn: Callable, *args):
+        if self.workers <= 0:
+            return fn(*args)
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise HashingPoolBusy()
+        try:
+            future: Future = self._get_executor().submit(fn, *args)
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future.result()
+
+    def hash(self, secret: str) -> str:
+        return self._run(_hash, secret, self.rounds)
+
+    def verify_and_update(self, secret: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return self._run(_verify_and_update, secret, hashed, self.rounds)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
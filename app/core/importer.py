@@ -0,0 +1,42 @@
+import csv
+import io
+import json
+from typing import BinaryIO, Iterator, Optional, Tuple, Union
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# (line number, parsed record or an error message)
+ParsedRecord = Tuple[int, Union[dict, str]]
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    name = (filename or "").lower()
+    if name.endswith(".csv") or content_type == "text/csv":
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+
+def iter_records(raw: BinaryIO, fmt: str) -> Iterator[ParsedRecord]:
+    """Parse an uploaded file one record at a time without reading it whole."""
+    text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            for record in reader:
+                # Empty cells mean "not provided"
+                yield reader.line_num, {key: value for key, value in record.items() if value not in ("", None)}
+        else:
+            for line_no, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    yield line_no, "Invalid JSON"
+                    continue
+                yield line_no, record if isinstance(record, dict) else "Expected a JSON object"
+    finally:
+        # Leave the underlying upload open for its owner to close
+        text.detach()
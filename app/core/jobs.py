@@ -0,0 +1,186 @@
+"""
+In-process workers for the job outbox (models.Job, crud_job).
+
+Each worker thread claims a batch of due jobs in a short transaction, runs
+them outside any transaction, then deletes the finished ones. A failed job is
+retried after an exponential backoff (JOBS_BACKOFF_BASE_SECONDS doubling up
+to JOBS_BACKOFF_MAX_SECONDS, with jitter) until JOBS_MAX_ATTEMPTS, after which
+it is kept as 'dead'. Delivery is at least once: handlers must tolerate a
+job running twice. Workers poll every JOBS_POLL_SECONDS and are woken right
+away when this process commits new jobs.
+"""
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core import webhooks
+from app.core.config import settings
+from app.core.metrics import CounterMetric, GaugeCallback, Histogram, register
+from app.crud import crud_job
+
+logger = logging.getLogger(__name__)
+
+# Job kind -> handler(job_id, payload JSON)
+HANDLERS: Dict[str, Callable[[int, str], None]] = {
+    "task.webhook": webhooks.deliver_task_event,
+}
+
+jobs_processed = register(CounterMetric(
+    "jobs_processed_total", "Job runs by kind and result (ok/retry/dead)"
+))
+job_duration = register(Histogram(
+    "job_duration_seconds", "Time spent running one job, by kind"
+))
+
+
+def backoff(attempts: int, base: float, maximum: float) -> float:
+    """Seconds before retrying a job that has failed `attempts` times."""
+    delay = min(base * 2 ** (attempts - 1), maximum)
+    # Spread retries of jobs that failed together
+    return delay * random.uniform(0.5, 1)
+
+
+class JobPool:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        workers: int,
+        batch_size: int,
+        poll_interval: float,
+        lease: float,
+        max_attempts: int,
+        backoff_base: float,
+        backoff_max: float,
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Queue depth as of the last time a worker went idle, for /metrics
+        self.stats: Dict[str, Optional[float]] = {"pending": 0, "due": 0, "dead": 0, "oldest_due_seconds": None}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def _run_job(self, db: Session, job) -> bool:
+        handler = HANDLERS.get(job.kind)
+        started = time.perf_counter()
+        try:
+            if handler is None:
+                raise LookupError(f"No handler for job kind {job.kind!r}")
+            handler(job.id, job.payload)
+        except Exception as exc:
+            dead = handler is None or job.attempts >= self.max_attempts
+            retry_in = None if dead else backoff(job.attempts, self.backoff_base, self.backoff_max)
+            crud_job.fail(db, job.id, f"{type(exc).__name__}: {exc}", retry_in)
+            jobs_processed.inc(kind=job.kind, result="dead" if dead else "retry")
+            logger.warning(
+                "Job %s (%s) failed on attempt %d%s", job.id, job.kind, job.attempts,
+                "; giving up" if dead else f"; retrying in {retry_in:.1f}s", exc_info=True,
+            )
+            return False
+        finally:
+            job_duration.observe(time.perf_counter() - started, kind=job.kind)
+        jobs_processed.inc(kind=job.kind, result="ok")
+        return True
+
+    def run_once(self) -> int:
+        """Claim and run one batch. Returns how many jobs were claimed."""
+        db = self.session_factory()
+        try:
+            claimed = crud_job.claim(db, self.batch_size, self.lease)
+            done = [job.id for job in claimed if self._run_job(db, job)]
+            crud_job.complete(db, done)
+            if len(claimed) < self.batch_size:
+                self.stats = crud_job.get_stats(db)
+            return len(claimed)
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                claimed = self.run_once()
+            except Exception:
+                logger.exception("Job worker failed to claim jobs")
+                claimed = 0
+            if claimed < self.batch_size:
+                # Drained: sleep until the next poll or a local commit adds jobs
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def start(self) -> None:
+        self._stop.clear()
+        for index in range(self.workers - len(self._threads)):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10) -> None:
+        """Stop once the batches in flight are finished."""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+
+def pool_from_settings(session_factory: Callable[[], Session]) -> JobPool:
+    return JobPool(
+        session_factory,
+        workers=settings.JOBS_WORKERS,
+        batch_size=settings.JOBS_BATCH_SIZE,
+        poll_interval=settings.JOBS_POLL_SECONDS,
+        lease=settings.JOBS_LEASE_SECONDS,
+        max_attempts=settings.JOBS_MAX_ATTEMPTS,
+        backoff_base=settings.JOBS_BACKOFF_BASE_SECONDS,
+        backoff_max=settings.JOBS_BACKOFF_MAX_SECONDS,
+    )
+
+
+# The pool this process runs (see app.main); None while it isn't running
+pool: Optional[JobPool] = None
+
+
+def start(session_factory: Callable[[], Session]) -> JobPool:
+    global pool
+    if pool is None:
+        pool = pool_from_settings(session_factory)
+        pool.start()
+    return pool
+
+
+def stop() -> None:
+    global pool
+    if pool is not None:
+        pool.stop()
+        pool = None
+
+for _name in ("pending", "due", "dead"):
+    register(GaugeCallback(
+        f"jobs_{_name}", f"Jobs {_name} in the outbox as last seen by this worker's job pool",
+        lambda name=_name: pool.stats[name] if pool is not None else 0,
+    ))
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_workers(session) -> None:
+    if session.info.pop("jobs_enqueued", False) and pool is not None:
+        pool.notify()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_jobs(session) -> None:
+    session.info.pop("jobs_enqueued", None)
@@ -0,0 +1,229 @@
+"""
+In-process metrics exposed in Prometheus text format at /metrics.
+
+Per-request SQL accounting relies on a context variable set by the HTTP
+middleware in app.main; engine event hooks installed by instrument_engine()
+add to it from whichever thread runs the statement.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (
+        '%s="%s"' % (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            # One slot per bucket, then +Inf, sum
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def totals(self) -> Tuple[float, float]:
+        """Observation count and sum across all label sets."""
+        with self._lock:
+            return (
+                sum(series[-2] for series in self._series.values()),
+                sum(series[-1] for series in self._series.values()),
+            )
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_format_labels(labels, ('le', repr(float(bound))))} {count:g}")
+                lines.append(f"{self.name}_bucket{_format_labels(labels, ('le', '+Inf'))} {series[-2]:g}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {series[-2]:g}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {series[-1]:.6f}")
+        return lines
+
+
+class CounterMetric:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._series: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._series.items()):
+                lines.append(f"{self.name}{_format_labels(labels)} {value:g}")
+        return lines
+
+
+class GaugeCallback:
+    """Gauge whose value is read when /metrics is scraped."""
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], float]):
+        self.name = name
+        self.help = help_text
+        self.read = read
+
+    def render(self) -> List[str]:
+        try:
+            value = self.read()
+        except Exception:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {value:g}"]
+
+
+REGISTRY: List = []
+
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+request_latency = register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route"))
+requests_total = register(CounterMetric(
+    "http_requests_total", "HTTP requests by route and status"))
+request_statements = register(Histogram(
+    "db_statements_per_request", "SQL statements executed per request", COUNT_BUCKETS))
+request_db_time = register(Histogram(
+    "db_time_per_request_seconds", "Time spent executing SQL per request"))
+pool_checkout_wait = register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection"))
+n_plus_one_total = register(CounterMetric(
+    "db_n_plus_one_requests_total", "Requests that repeated one statement at least the N+1 threshold"))
+
+
+@dataclass
+class RequestStats:
+    statements: int = 0
+    db_time: float = 0.0
+    by_statement: Counter = field(default_factory=Counter)
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_db_stats", default=None)
+
+
+def begin_request() -> RequestStats:
+    stats = RequestStats()
+    _current.set(stats)
+    return stats
+
+
+def route_label(scope: dict) -> str:
+    """
+    Full path template of the route that served the request, e.g.
+    /api/v1/tasks/{task_id}. Depending on the FastAPI version scope["route"]
+    carries the path with its routers' prefixes or only the part below them,
+    so the prefix is taken from the request path in front of the matched part.
+    """
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        return "unmatched"
+    try:
+        matched = route.path_format.format(**scope.get("path_params", {}))
+    except (AttributeError, KeyError, IndexError, ValueError):
+        return path
+    request_path = scope.get("path", "")
+    if not request_path.endswith(matched):
+        return path
+    return request_path[:len(request_path) - len(matched)] + path
+
+
+def end_request(
+    stats: RequestStats, method: str, route: str, status_code: int, elapsed: float, n_plus_one_threshold: int
+) -> None:
+    request_latency.observe(elapsed, method=method, route=route)
+    requests_total.inc(method=method, route=route, status=str(status_code))
+    request_statements.observe(stats.statements, method=method, route=route)
+    request_db_time.observe(stats.db_time, method=method, route=route)
+    if n_plus_one_threshold and stats.by_statement:
+        statement, count = stats.by_statement.most_common(1)[0]
+        if count >= n_plus_one_threshold:
+            n_plus_one_total.inc(method=method, route=route)
+            logger.warning(
+                "Possible N+1 on %s %s: statement executed %d times: %s",
+                method, route, count, " ".join(statement.split()),
+            )
+
+
+def instrument_engine(engine: Engine, pool_gauges: bool = True) -> None:
+    """Time every statement and charge it to the current request, if any."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_time += elapsed
+            stats.by_statement[statement] += 1
+
+    pool = engine.pool
+    if pool_gauges and isinstance(pool, QueuePool):
+        register(GaugeCallback("db_pool_size", "Configured pool size", pool.size))
+        register(GaugeCallback("db_pool_checked_out", "Connections currently checked out", pool.checkedout))
+        register(GaugeCallback("db_pool_checked_in", "Idle connections in the pool", pool.checkedin))
+        register(GaugeCallback("db_pool_overflow", "Connections open beyond pool_size", pool.overflow))
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_checkout_wait.observe(time.perf_counter() - start)
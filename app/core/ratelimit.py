@@ -0,0 +1,185 @@
+"""
+Login brute-force and burst protection.
+
+Sliding-window limiters run in front of crud_user.authenticate: every attempt
+counts against the client IP, failed attempts count against the email. The
+counters, and the negative cache of unknown emails, live in a store: "memory"
+is per worker, "redis" shares them across workers.
+"""
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+class MemoryStore:
+    """Per-process store; bounded to `maxsize` keys of each kind."""
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self._windows: Dict[str, Tuple[deque, float]] = {}
+        self._values: Dict[str, Tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+
+    def _events(self, key: str, now: float, window: float) -> deque:
+        events = self._windows.get(key, (None,))[0]
+        if events is None:
+            if len(self._windows) >= self.maxsize:
+                self._purge_windows(now)
+            events = deque()
+            self._windows[key] = (events, window)
+        while events and events[0] <= now - window:
+            events.popleft()
+        return events
+
+    def _purge_windows(self, now: float) -> None:
+        for key, (events, window) in list(self._windows.items()):
+            if not events or events[-1] <= now - window:
+                del self._windows[key]
+        # Still full of live keys: drop the oldest ones
+        for key in list(self._windows)[: max(len(self._windows) - self.maxsize + 1, 0)]:
+            del self._windows[key]
+
+    def hit(self, key: str, now: float, window: float, limit: int) -> Optional[float]:
+        """Record an event unless `limit` events already fall in the window; else seconds to wait."""
+        with self._lock:
+            events = self._events(key, now, window)
+            if len(events) >= limit:
+                return events[0] + window - now
+            events.append(now)
+            return None
+
+    def check(self, key: str, now: float, window: float, limit: int) -> Optional[float]:
+        with self._lock:
+            events = self._events(key, now, window)
+            if len(events) >= limit:
+                return events[0] + window - now
+            return None
+
+    def record(self, key: str, now: float, window: float) -> None:
+        with self._lock:
+            self._events(key, now, window).append(now)
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._windows.pop(key, None)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._values.get(key)
+            if item is None:
+                return None
+            if item[1] < time.monotonic():
+                del self._values[key]
+                return None
+            return item[0]
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            if len(self._values) >= self.maxsize:
+                now = time.monotonic()
+                for stale in [k for k, (_, expires_at) in self._values.items() if expires_at < now]:
+                    del self._values[stale]
+                if len(self._values) >= self.maxsize:
+                    del self._values[next(iter(self._values))]
+            self._values[key] = (value, time.monotonic() + ttl)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._values.pop(key, None)
+
+
+class RedisStore:
+    """Shared store: sliding windows as sorted sets of timestamps."""
+
+    def __init__(self, url: str, prefix: str = "login"):
+        import redis  # optional dependency, only needed for this backend
+
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def _window(self, key: str, now: float, window: float):
+        name = f"{self._prefix}:window:{key}"
+        pipeline = self._client.pipeline()
+        pipeline.zremrangebyscore(name, "-inf", now - window)
+        pipeline.zrange(name, 0, 0, withscores=True)
+        pipeline.zcard(name)
+        return name, pipeline
+
+    def hit(self, key: str, now: float, window: float, limit: int) -> Optional[float]:
+        name, pipeline = self._window(key, now, window)
+        pipeline.zadd(name, {repr(now): now})
+        pipeline.expire(name, math.ceil(window))
+        _, oldest, count, _, _ = pipeline.execute()
+        if count >= limit:
+            # Over the limit: this attempt doesn't count
+            self._client.zrem(name, repr(now))
+            return oldest[0][1] + window - now
+        return None
+
+    def check(self, key: str, now: float, window: float, limit: int) -> Optional[float]:
+        _, pipeline = self._window(key, now, window)
+        _, oldest, count = pipeline.execute()
+        return oldest[0][1] + window - now if count >= limit else None
+
+    def record(self, key: str, now: float, window: float) -> None:
+        name = f"{self._prefix}:window:{key}"
+        pipeline = self._client.pipeline()
+        pipeline.zadd(name, {repr(now): now})
+        pipeline.expire(name, math.ceil(window))
+        pipeline.execute()
+
+    def reset(self, key: str) -> None:
+        self._client.delete(f"{self._prefix}:window:{key}")
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._client.get(f"{self._prefix}:value:{key}")
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._client.set(f"{self._prefix}:value:{key}", value, ex=math.ceil(ttl))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(f"{self._prefix}:value:{key}")
+
+
+class LoginThrottle:
+    def __init__(self, store, ip_limit: int, ip_window: float, email_limit: int, email_window: float):
+        self.store = store
+        self.ip_limit = ip_limit
+        self.ip_window = ip_window
+        self.email_limit = email_limit
+        self.email_window = email_window
+
+    def before_attempt(self, ip: str, email: str) -> Optional[int]:
+        """Count the attempt; seconds the client must wait if it is over a limit."""
+        now = time.time()
+        retry_after = self.store.check(f"email:{email}", now, self.email_window, self.email_limit)
+        if retry_after is None:
+            retry_after = self.store.hit(f"ip:{ip}", now, self.ip_window, self.ip_limit)
+        return None if retry_after is None else max(math.ceil(retry_after), 1)
+
+    def failed(self, email: str) -> None:
+        self.store.record(f"email:{email}", time.time(), self.email_window)
+
+    def succeeded(self, email: str) -> None:
+        self.store.reset(f"email:{email}")
+
+
+def _store_from_settings():
+    if settings.LOGIN_RATE_LIMIT_BACKEND == "redis":
+        return RedisStore(settings.LOGIN_RATE_LIMIT_REDIS_URL)
+    return MemoryStore()
+
+
+store = _store_from_settings()
+
+login_throttle = LoginThrottle(
+    store,
+    ip_limit=settings.LOGIN_IP_LIMIT,
+    ip_window=settings.LOGIN_IP_WINDOW_SECONDS,
+    email_limit=settings.LOGIN_EMAIL_FAILURE_LIMIT,
+    email_window=settings.LOGIN_EMAIL_WINDOW_SECONDS,
+)
@@ -0,0 +1,180 @@
+"""
+Cache of already serialized list responses, invalidated by table versions.
+
+Every committed write bumps a version counter for each table it touched.
+Cache keys embed the current versions of the tables a response was built
+from, so a write makes all dependent entries unreachable at once; they age
+out of the size-bounded LRU on their own. Versions (and, with Redis, a shared
+copy of the entries) live in a backend so several workers see the same
+versions: "local" keeps them in this process and is only correct for a
+single worker (the cache stays off with several), "redis" shares them.
+"""
+import hashlib
+import logging
+import threading
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import orjson
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.cache import SizedLRUCache
+from app.core.config import settings
+from app.core.metrics import CounterMetric, register
+
+logger = logging.getLogger(__name__)
+
+cache_requests = register(CounterMetric(
+    "response_cache_requests_total", "Response cache lookups by route and result (hit/miss)"
+))
+
+# A cached response: body and the headers that go with it
+Entry = Tuple[bytes, Dict[str, str]]
+
+
+class LocalBackend:
+    """Versions kept in this process; entries live only in the in-process LRU."""
+
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def versions(self, tables: Sequence[str]) -> Tuple[int, ...]:
+        return tuple(self._versions.get(table, 0) for table in tables)
+
+    def bump(self, tables: Iterable[str]) -> None:
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        pass
+
+
+class RedisBackend:
+    """Versions and entries shared by all workers through Redis."""
+
+    def __init__(self, url: str, prefix: str = "response-cache"):
+        import redis  # optional dependency, only needed for this backend
+
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def versions(self, tables: Sequence[str]) -> Tuple[int, ...]:
+        values = self._client.mget([f"{self._prefix}:version:{table}" for table in tables])
+        return tuple(int(value or 0) for value in values)
+
+    def bump(self, tables: Iterable[str]) -> None:
+        pipeline = self._client.pipeline(transaction=False)
+        for table in tables:
+            pipeline.incr(f"{self._prefix}:version:{table}")
+        pipeline.execute()
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(f"{self._prefix}:entry:{key}")
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._client.set(f"{self._prefix}:entry:{key}", value, ex=ttl)
+
+
+def _entry_size(entry: Entry) -> int:
+    body, headers = entry
+    return len(body) + sum(len(name) + len(value) for name, value in headers.items())
+
+
+class ResponseCache:
+    def __init__(self, backend, max_bytes: int, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.local = SizedLRUCache(max_bytes, ttl, sizeof=_entry_size)
+
+    def key(self, route: str, tables: Sequence[str], *parts) -> str:
+        """Key for `route` with the given params/scope at the tables' current versions."""
+        versions = self.backend.versions(tables)
+        raw = orjson.dumps([route, list(tables), list(versions), [str(part) for part in parts]])
+        return hashlib.sha1(raw).hexdigest()
+
+    def get(self, route: str, key: str) -> Optional[Entry]:
+        entry = self.local.get(key)
+        if entry is None:
+            shared = self.backend.get(key)
+            if shared is not None:
+                body, headers = orjson.loads(shared)
+                entry = (body.encode(), headers)
+                self.local.set(key, entry)
+        cache_requests.inc(route=route, result="miss" if entry is None else "hit")
+        return entry
+
+    def set(self, key: str, body: bytes, headers: Dict[str, str]) -> None:
+        self.local.set(key, (body, headers))
+        self.backend.set(key, orjson.dumps([body.decode(), headers]), self.ttl)
+
+    def bump(self, tables: Iterable[str]) -> None:
+        try:
+            self.backend.bump(tables)
+        except Exception:
+            # Don't fail a committed write; entries still expire after the TTL
+            logger.exception("Failed to bump table versions for %s", sorted(tables))
+
+
+def _cache_from_settings() -> Optional[ResponseCache]:
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return None
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        backend = RedisBackend(settings.RESPONSE_CACHE_REDIS_URL)
+    elif settings.WEB_CONCURRENCY > 1:
+        # Other workers' writes would not invalidate this one's pages
+        logger.warning(
+            "RESPONSE_CACHE_BACKEND=local with %d workers: response cache disabled; "
+            "set RESPONSE_CACHE_BACKEND=redis to cache across workers",
+            settings.WEB_CONCURRENCY,
+        )
+        return None
+    else:
+        backend = LocalBackend()
+    return ResponseCache(
+        backend, max_bytes=settings.RESPONSE_CACHE_MAX_BYTES, ttl=settings.RESPONSE_CACHE_TTL_SECONDS
+    )
+
+
+response_cache: Optional[ResponseCache] = _cache_from_settings()
+
+
+# Table version bumps. Tables written through the ORM (flush) or with
+# INSERT/UPDATE/DELETE statements are collected per session and bumped once
+# the transaction commits; a rollback forgets them.
+
+def _written(session: Session) -> set:
+    return session.info.setdefault("written_tables", set())
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session, flush_context) -> None:
+    written = _written(session)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(type(obj), "__tablename__", None)
+        if table is not None:
+            written.add(table)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_statements(state) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        table = getattr(state.statement, "table", None)
+        if table is not None:
+            _written(state.session).add(table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_versions(session) -> None:
+    written = session.info.pop("written_tables", None)
+    if written and response_cache is not None:
+        response_cache.bump(written)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_written(session) -> None:
+    session.info.pop("written_tables", None)
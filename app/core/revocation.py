@@ -0,0 +1,191 @@
+"""
+Access token revocation checks without a database round trip.
+
+Revoked token ids (`jti`) live in the revoked_tokens table. Every worker
+mirrors them in a Bloom filter: a token whose id is not in the filter is
+certainly not revoked, which is the answer for nearly every request. Only on
+a hit (a revoked token, or a false positive at REVOCATION_FILTER_ERROR_RATE)
+is the table asked. A background thread adds new revocations every
+REVOCATION_SYNC_SECONDS, so a token revoked through another worker is
+refused everywhere within that time; revocations made by this worker apply
+at once. The filter is rebuilt every REVOCATION_REBUILD_SECONDS, which drops
+tokens that have expired anyway.
+
+A sync reads every revocation recorded since REVOCATION_SYNC_MARGIN_SECONDS
+before the newest one it has seen. Rows get their id and revoked_at when
+inserted but only become visible on commit, so a position past the last row
+seen could skip one committed late.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import CounterMetric, GaugeCallback, register
+from app.crud import crud_token
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+revocation_checks = register(CounterMetric(
+    "token_revocation_checks_total",
+    "Access token revocation checks by result (miss: filter only, revoked/false_positive: confirmed in the DB)",
+))
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.bits = max(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(round(self.bits / capacity * math.log(2)), 1)
+        self.count = 0
+        self._array = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((first + index * second) % self.bits for index in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._array[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._array[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class Denylist:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        capacity: int,
+        error_rate: float,
+        sync_interval: float,
+        rebuild_interval: float,
+        sync_margin: float,
+    ):
+        self.session_factory = session_factory
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self.sync_margin = timedelta(seconds=sync_margin)
+        self._filter = BloomFilter(capacity, error_rate)
+        # Newest revoked_at already synced, as recorded by the database (never this clock)
+        self._last_seen: Optional[datetime] = None
+        self._rebuilt_at = 0.0
+        # Local revocations during a rebuild, carried over into the new filter
+        self._added_during_rebuild: Optional[list] = None
+        # Results of DB confirmations of filter hits
+        self._confirmed = TTLCache(maxsize=10000, ttl=sync_interval)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, jtis: Iterable[str]) -> None:
+        """Deny tokens revoked by this worker right away, ahead of the next sync."""
+        with self._lock:
+            for jti in jtis:
+                self._filter.add(jti)
+                self._confirmed.set(jti, True)
+                if self._added_during_rebuild is not None:
+                    self._added_during_rebuild.append(jti)
+
+    @property
+    def size(self) -> int:
+        return self._filter.count
+
+    def is_revoked(self, jti: str) -> bool:
+        if jti not in self._filter:
+            revocation_checks.inc(result="miss")
+            return False
+        revoked = self._confirmed.get(jti)
+        if revoked is None:
+            db = self.session_factory()
+            try:
+                revoked = crud_token.is_revoked(db, jti)
+            finally:
+                db.close()
+            self._confirmed.set(jti, revoked)
+        revocation_checks.inc(result="revoked" if revoked else "false_positive")
+        return revoked
+
+    def sync(self) -> None:
+        """Add revocations made since the last sync; rebuild the filter when it is due."""
+        db = self.session_factory()
+        try:
+            if time.monotonic() - self._rebuilt_at >= self.rebuild_interval:
+                with self._lock:
+                    self._added_during_rebuild = []
+                crud_token.purge_expired(db)
+                rows = crud_token.get_revoked_since(db, None)
+                # Grow the filter before it fills up and its error rate climbs
+                fresh = BloomFilter(max(self.capacity, 2 * len(rows)), self.error_rate)
+                for jti, _ in rows:
+                    fresh.add(jti)
+                with self._lock:
+                    for jti in self._added_during_rebuild:
+                        fresh.add(jti)
+                    self._added_during_rebuild = None
+                    self._filter = fresh
+                    self._last_seen = max((revoked_at for _, revoked_at in rows), default=None)
+                self._rebuilt_at = time.monotonic()
+                return
+            since = None if self._last_seen is None else self._last_seen - self.sync_margin
+            rows = crud_token.get_revoked_since(db, since)
+        finally:
+            db.close()
+        if rows:
+            with self._lock:
+                for jti, _ in rows:
+                    # Rows inside the margin come back on every sync
+                    if jti not in self._filter:
+                        self._filter.add(jti)
+                newest = max(revoked_at for _, revoked_at in rows)
+                if self._last_seen is None or newest > self._last_seen:
+                    self._last_seen = newest
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.sync_interval):
+            try:
+                self.sync()
+            except Exception:
+                logger.exception("Failed to sync revoked tokens; retrying in %ss", self.sync_interval)
+
+    def start(self) -> None:
+        """Load the current revocations, then keep syncing in the background."""
+        if self._thread is None:
+            self.sync()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="token-denylist", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+denylist = Denylist(
+    SessionLocal,
+    capacity=settings.REVOCATION_FILTER_CAPACITY,
+    error_rate=settings.REVOCATION_FILTER_ERROR_RATE,
+    sync_interval=settings.REVOCATION_SYNC_SECONDS,
+    rebuild_interval=settings.REVOCATION_REBUILD_SECONDS,
+    sync_margin=settings.REVOCATION_SYNC_MARGIN_SECONDS,
+)
+
+register(GaugeCallback(
+    "token_denylist_size", "Revoked access tokens in this worker's filter", lambda: denylist.size
+))
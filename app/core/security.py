@@ -1,10 +1,18 @@
+import hashlib
+import secrets
+import uuid
 from datetime import datetime, timedelta, timezone
-from typing import Any, Union, Optional
+from typing import Any, Dict, Tuple, Union, Optional
 from jose import jwt
-from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.hashing import PasswordHasher, get_crypt_context
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = get_crypt_context(settings.BCRYPT_ROUNDS)
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+    rounds=settings.BCRYPT_ROUNDS,
+)
 
 ALGORITHM = settings.ALGORITHM
 
@@ -13,8 +21,15 @@ def _normalize_bcrypt_secret(password: str) -> str:
     password_bytes = password.encode("utf-8")[:72]
     return password_bytes.decode("utf-8", errors="ignore")
 
+def new_token_id() -> str:
+    """A `jti` for an access token, by which it can be revoked."""
+    return uuid.uuid4().hex
+
 def create_access_token(
-    subject: Union[str, Any], expires_delta: timedelta = None
+    subject: Union[str, Any],
+    expires_delta: timedelta = None,
+    claims: Optional[Dict[str, Any]] = None,
+    jti: Optional[str] = None,
 ) -> str:
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
@@ -22,12 +37,24 @@ def create_access_token(
         expire = datetime.now(timezone.utc) + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject), "jti": jti or new_token_id()}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_refresh_token() -> str:
+    """An opaque refresh token; only its hash_token() digest is stored."""
+    return secrets.token_urlsafe(32)
+
+def hash_token(token: str) -> str:
+    # Refresh tokens are random, so a fast unsalted digest is enough (no bcrypt)
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(_normalize_bcrypt_secret(plain_password), hashed_password)
+    return verify_and_update_password(plain_password, hashed_password)[0]
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; also return a new hash if the stored one uses an outdated cost."""
+    return password_hasher.verify_and_update(_normalize_bcrypt_secret(plain_password), hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(_normalize_bcrypt_secret(password))
+    return password_hasher.hash(_normalize_bcrypt_secret(password))
@@ -0,0 +1,49 @@
+from typing import Any, Iterable, Sequence
+
+import orjson
+from fastapi.responses import JSONResponse
+
+from app.schemas.task import TaskResponse, TaskUserSummary
+from app.schemas.user import UserResponse
+
+# Serialized field sets; keeping them derived from the response models keeps
+# the fast path and the OpenAPI schema in step
+TASK_FIELDS = tuple(TaskResponse.model_fields)
+USER_FIELDS = tuple(UserResponse.model_fields)
+# Task relationships `expand=` can embed, and the user fields they embed
+TASK_EXPANSIONS = ("assignee", "assigned_by")
+TASK_USER_FIELDS = tuple(TaskUserSummary.model_fields)
+
+# Matches pydantic's JSON output (UTC as "Z", naive datetimes left as is)
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson; already encoded bytes are sent as is."""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+def _as_dict(obj: Any, fields: Sequence[str], expand: Sequence[str] = ()) -> dict:
+    data = {field: getattr(obj, field, None) for field in fields}
+    for name in expand:
+        # Expanded relationships are all users (TASK_EXPANSIONS)
+        related = getattr(obj, name)
+        data[name] = None if related is None else _as_dict(related, TASK_USER_FIELDS)
+    return data
+
+
+def dump_one(obj: Any, fields: Sequence[str], expand: Sequence[str] = ()) -> bytes:
+    """
+    Encode an ORM object or row straight to JSON bytes, skipping pydantic
+    validation. Callers must pass data the response model already accepts.
+    `expand` names relationships to embed; they must already be loaded.
+    """
+    return orjson.dumps(_as_dict(obj, fields, expand), option=ORJSON_OPTIONS)
+
+
+def dump_many(objs: Iterable[Any], fields: Sequence[str], expand: Sequence[str] = ()) -> bytes:
+    return orjson.dumps([_as_dict(obj, fields, expand) for obj in objs], option=ORJSON_OPTIONS)
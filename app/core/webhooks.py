@@ -0,0 +1,29 @@
+"""
+Task event webhooks, delivered by the job workers (job kind "task.webhook").
+
+Each committed task change is POSTed to TASK_WEBHOOK_URL as the same JSON
+event /tasks/stream sends. With TASK_WEBHOOK_SECRET set, the body is signed
+in an `X-Signature: sha256=<hex hmac>` header. Deliveries are retried, so a
+receiver may see one twice; `X-Delivery-Id` stays the same across retries.
+"""
+import hashlib
+import hmac
+import urllib.request
+
+from app.core.config import settings
+
+
+def deliver_task_event(job_id: int, payload: str) -> None:
+    body = payload.encode()
+    request = urllib.request.Request(
+        settings.TASK_WEBHOOK_URL,
+        data=body,
+        method="POST",
+        headers={"Content-Type": "application/json", "X-Delivery-Id": str(job_id)},
+    )
+    if settings.TASK_WEBHOOK_SECRET:
+        signature = hmac.new(settings.TASK_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+        request.add_header("X-Signature", f"sha256={signature}")
+    # Non-2xx answers raise HTTPError, which schedules a retry
+    with urllib.request.urlopen(request, timeout=settings.TASK_WEBHOOK_TIMEOUT_SECONDS):
+        pass
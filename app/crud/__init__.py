@@ -1 +1 @@
-from . import crud_user, crud_task
+from . import crud_user, crud_task, crud_task_stats, crud_task_import, crud_task_archive, crud_job, crud_token, crud_user_async, crud_task_async
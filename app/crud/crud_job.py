@@ -0,0 +1,104 @@
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+import orjson
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from app.core.clock import utcnow
+from app.core.config import settings
+from app.core.serialization import ORJSON_OPTIONS
+from app.models.job import Job
+
+# Jobs every committed task write fans out to, one per event
+TASK_EVENT_JOBS = ("task.webhook",) if settings.TASK_WEBHOOK_URL else ()
+
+def enqueue(db: Session, kind: str, payloads: Iterable[dict], delay: float = 0) -> int:
+    """
+    Add one `kind` job per payload with a single INSERT. Does not commit: the
+    jobs become visible to the workers with the caller's own transaction.
+    """
+    run_after = utcnow() + timedelta(seconds=delay)
+    rows = [
+        {
+            "kind": kind,
+            "payload": orjson.dumps(payload, option=ORJSON_OPTIONS).decode(),
+            "status": "pending",
+            "attempts": 0,
+            "run_after": run_after,
+        }
+        for payload in payloads
+    ]
+    if rows:
+        db.execute(insert(Job).values(rows))
+        # Lets app.core.jobs wake the local workers once this commits
+        db.info["jobs_enqueued"] = True
+    return len(rows)
+
+def enqueue_task_events(db: Session, events: List[dict]) -> None:
+    for kind in TASK_EVENT_JOBS:
+        enqueue(db, kind, events)
+
+def claim(db: Session, batch_size: int, lease: float):
+    """
+    Claim up to `batch_size` due jobs and commit. Rows another worker has
+    locked are skipped, and each claimed job's run_after moves `lease` seconds
+    ahead, so a worker that dies mid-job only delays it. Returns
+    (id, kind, payload, attempts) rows with attempts already counting this run.
+    """
+    now = utcnow()
+    due = (Job.status == "pending", Job.run_after <= now)
+    ids = list(db.scalars(
+        select(Job.id)
+        .where(*due)
+        .order_by(Job.run_after, Job.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ))
+    if not ids:
+        db.rollback()
+        return []
+    # Re-checking `due` keeps two workers from claiming the same job where
+    # there are no row locks (SQLite)
+    stmt = (
+        update(Job)
+        .where(Job.id.in_(ids), *due)
+        .values(run_after=now + timedelta(seconds=lease), attempts=Job.attempts + 1)
+        .execution_options(synchronize_session=False)
+    )
+    columns = (Job.id, Job.kind, Job.payload, Job.attempts)
+    if db.get_bind().dialect.update_returning:
+        rows = db.execute(stmt.returning(*columns)).all()
+    else:
+        # MySQL: the rows are locked, so the update touched exactly these
+        db.execute(stmt)
+        rows = db.execute(select(*columns).where(Job.id.in_(ids))).all()
+    db.commit()
+    return rows
+
+def complete(db: Session, job_ids: List[int]) -> None:
+    if job_ids:
+        db.execute(delete(Job).where(Job.id.in_(job_ids)).execution_options(synchronize_session=False))
+        db.commit()
+
+def fail(db: Session, job_id: int, error: str, retry_in: Optional[float]) -> None:
+    """Record a failed run: retry after `retry_in` seconds, or give up on the job if None."""
+    values = {"last_error": error[:255]}
+    if retry_in is None:
+        values["status"] = "dead"
+    else:
+        values["run_after"] = utcnow() + timedelta(seconds=retry_in)
+    db.execute(update(Job).where(Job.id == job_id).values(**values).execution_options(synchronize_session=False))
+    db.commit()
+
+def get_stats(db: Session) -> Dict[str, Optional[float]]:
+    """Queue depth: pending jobs (and how many are due), dead jobs, age of the oldest due job."""
+    now = utcnow()
+    counts = dict(db.execute(select(Job.status, func.count()).group_by(Job.status)).all())
+    due, oldest = db.execute(
+        select(func.count(), func.min(Job.run_after)).where(Job.status == "pending", Job.run_after <= now)
+    ).one()
+    return {
+        "pending": counts.get("pending", 0),
+        "due": due,
+        "dead": counts.get("dead", 0),
+        "oldest_due_seconds": (now - oldest).total_seconds() if oldest is not None else None,
+    }
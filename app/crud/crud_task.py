@@ -1,42 +1,451 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.models.task import Task
-from app.schemas.task import TaskCreate, TaskUpdate
+from sqlalchemy import case, delete, func, insert, literal_column, or_, select, table, union_all, update
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import Session, load_only, selectinload
+from sqlalchemy.orm.exc import StaleDataError
+from collections import Counter
+from itertools import chain
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+from app.core.clock import utcnow
+from app.core.events import broker, task_event
+from app.crud import crud_job, crud_task_stats
+from app.models.task import Task, TASK_STATUSES
+from app.models.task_archive import ArchivedTask
+from app.models.user import User
+from app.schemas.task import TaskCreate, TaskUpdate, TaskFilter, TaskBulkUpdate, TaskBulkResult
 
-def get_task(db: Session, task_id: int):
-    return db.query(Task).filter(Task.id == task_id).first()
+class VersionConflict(Exception):
+    """The task was changed by someone else since the caller read it."""
 
-def get_multi(db: Session, skip: int = 0, limit: int = 100) -> List[Task]:
-    return db.query(Task).offset(skip).limit(limit).all()
+# Always loaded with a sparse fieldset: the ETag needs the version, the
+# permission check the assignee
+SPARSE_BASE_COLUMNS = ("id", "version", "assignee_id")
 
-def get_multi_by_assignee(db: Session, assignee_id: int, skip: int = 0, limit: int = 100) -> List[Task]:
-    return db.query(Task).filter(Task.assignee_id == assignee_id).offset(skip).limit(limit).all()
+def load_options(fields: Optional[Sequence[str]] = None, expand: Sequence[str] = ()) -> list:
+    """
+    Loader options for `fields=`/`expand=`: a column-restricted SELECT of
+    tasks, and one batched SELECT ... WHERE id IN (...) of the users behind
+    each expanded relationship (never a lazy load per task).
+    """
+    options = []
+    if fields is not None:
+        # selectinload batches on the foreign keys, so they must be loaded too
+        columns = dict.fromkeys((*SPARSE_BASE_COLUMNS, *fields, *(f"{name}_id" for name in expand)))
+        options.append(load_only(*(getattr(Task, column) for column in columns)))
+    for name in expand:
+        options.append(
+            selectinload(getattr(Task, name)).load_only(User.id, User.custom_username, User.email)
+        )
+    return options
+
+def get_task(
+    db: Session, task_id: int, fields: Optional[Sequence[str]] = None, expand: Sequence[str] = ()
+):
+    query = db.query(Task)
+    if fields is not None or expand:
+        query = query.options(*load_options(fields, expand))
+    return query.filter(Task.id == task_id).first()
+
+def get_archived_task(db: Session, task_id: int):
+    return db.get(ArchivedTask, task_id)
+
+def _fts5_query(q: str) -> str:
+    # Quote every term so user input is never parsed as FTS5 query syntax
+    return " ".join('"%s"' % term.replace('"', '""') for term in q.split())
+
+def search_clause(db: Session, q: str, model=Task):
+    """Full-text predicate on title/description for the current backend."""
+    if model is not Task:
+        # The archive has no full-text index
+        pattern = f"%{q}%"
+        return or_(model.title.ilike(pattern), model.description.ilike(pattern))
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        return match(Task.title, Task.description, against=q).in_natural_language_mode()
+    if dialect == "sqlite":
+        fts = table("tasks_fts")
+        return Task.id.in_(
+            select(literal_column("rowid"))
+            .select_from(fts)
+            .where(literal_column("tasks_fts").op("MATCH")(_fts5_query(q)))
+        )
+    pattern = f"%{q}%"
+    return or_(Task.title.ilike(pattern), Task.description.ilike(pattern))
+
+def apply_filters(db: Session, query, filters: Optional[TaskFilter], model=Task):
+    if filters is None:
+        return query
+    if filters.status is not None:
+        query = query.filter(model.status == filters.status)
+    if filters.assignee_id is not None:
+        query = query.filter(model.assignee_id == filters.assignee_id)
+    if filters.assigned_by_id is not None:
+        query = query.filter(model.assigned_by_id == filters.assigned_by_id)
+    if filters.created_after is not None:
+        query = query.filter(model.created_at >= filters.created_after)
+    if filters.created_before is not None:
+        query = query.filter(model.created_at < filters.created_before)
+    if filters.updated_after is not None:
+        query = query.filter(model.updated_at >= filters.updated_after)
+    if filters.updated_before is not None:
+        query = query.filter(model.updated_at < filters.updated_before)
+    if filters.q:
+        query = query.filter(search_clause(db, filters.q, model))
+    return query
+
+def _listing(db: Session, filters: Optional[TaskFilter], assignee_id: Optional[int] = None, model=Task):
+    query = db.query(model)
+    if assignee_id is not None:
+        query = query.filter(model.assignee_id == assignee_id)
+        if filters is not None:
+            filters = filters.model_copy(update={"assignee_id": None})
+    return apply_filters(db, query, filters, model)
+
+def _page(query, skip: int, limit: int, after_id: Optional[int]):
+    # Seek past the cursor when given; OFFSET is kept for backward compatibility
+    query = query.order_by(Task.id)
+    if after_id is not None:
+        query = query.filter(Task.id > after_id)
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+def get_multi(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    filters: Optional[TaskFilter] = None,
+) -> List[Task]:
+    return _page(_listing(db, filters), skip, limit, after_id).all()
+
+def get_multi_by_assignee(
+    db: Session,
+    assignee_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    filters: Optional[TaskFilter] = None,
+) -> List[Task]:
+    return _page(_listing(db, filters, assignee_id), skip, limit, after_id).all()
+
+def get_page(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    filters: Optional[TaskFilter] = None,
+    assignee_id: Optional[int] = None,
+    fields: Optional[Sequence[str]] = None,
+    expand: Sequence[str] = (),
+) -> List[Task]:
+    """Same page as get_page_rows, as tasks loaded with load_options(fields, expand)."""
+    query = _listing(db, filters, assignee_id).options(*load_options(fields, expand))
+    return _page(query, skip, limit, after_id).all()
+
+# Every column of TaskResponse, for reads that skip ORM object construction
+EXPORT_COLUMNS = (
+    Task.id, Task.title, Task.description, Task.status,
+    Task.assignee_id, Task.assigned_by_id, Task.created_at, Task.updated_at, Task.version,
+)
+ARCHIVE_COLUMNS = tuple(getattr(ArchivedTask, column.key) for column in EXPORT_COLUMNS)
+
+def _rows_with_archive(db: Session, skip, limit, after_id, filters, assignee_id):
+    """
+    One page over live and archived tasks: each table contributes its own
+    first `skip + limit` rows (or `limit` past the cursor) in id order, and
+    only those are merged.
+    """
+    branches = []
+    for model, columns in ((Task, EXPORT_COLUMNS), (ArchivedTask, ARCHIVE_COLUMNS)):
+        query = _listing(db, filters, assignee_id, model).with_entities(*columns).order_by(model.id)
+        if after_id is not None:
+            query = query.filter(model.id > after_id)
+        # SQLite can't ORDER BY/LIMIT inside a UNION member, so wrap each one
+        branches.append(select(query.limit(limit + (skip if after_id is None else 0)).subquery()))
+    merged = union_all(*branches).subquery()
+    page = select(merged).order_by(merged.c.id).limit(limit)
+    if after_id is None and skip:
+        page = page.offset(skip)
+    return db.execute(page).all()
+
+def get_page_rows(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    filters: Optional[TaskFilter] = None,
+    assignee_id: Optional[int] = None,
+    include_archived: bool = False,
+):
+    """Same page as get_multi/get_multi_by_assignee, as plain row tuples (EXPORT_COLUMNS)."""
+    if include_archived:
+        return _rows_with_archive(db, skip, limit, after_id, filters, assignee_id)
+    query = _listing(db, filters, assignee_id).with_entities(*EXPORT_COLUMNS)
+    return _page(query, skip, limit, after_id).all()
+
+def iter_rows(
+    db: Session,
+    filters: Optional[TaskFilter] = None,
+    assignee_id: Optional[int] = None,
+    batch_size: int = 1000,
+    include_archived: bool = False,
+):
+    """
+    Yield plain row tuples (EXPORT_COLUMNS) in id order through a server-side
+    cursor, fetching `batch_size` rows at a time and never building ORM objects.
+    With `include_archived`, archived tasks follow the live ones.
+    """
+    query = _listing(db, filters, assignee_id).with_entities(*EXPORT_COLUMNS).order_by(Task.id)
+    if not include_archived:
+        yield from query.yield_per(batch_size)
+        return
+    archived = (
+        _listing(db, filters, assignee_id, ArchivedTask)
+        .with_entities(*ARCHIVE_COLUMNS)
+        .order_by(ArchivedTask.id)
+    )
+    yield from chain(query.yield_per(batch_size), archived.yield_per(batch_size))
+
+# Fingerprints identify the exact contents of a page for ETags: any insert,
+# delete or update among the page's rows changes at least one component.
+
+def fingerprint(tasks: List[Task]) -> Tuple:
+    """Fingerprint of already loaded tasks; matches get_page_fingerprint."""
+    return (
+        len(tasks),
+        max((task.id for task in tasks), default=None),
+        sum(task.id for task in tasks) if tasks else None,
+        # Versions only grow, so any update inside the page changes the sum
+        sum(task.version for task in tasks) if tasks else None,
+    )
+
+def get_page_fingerprint(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    filters: Optional[TaskFilter] = None,
+    assignee_id: Optional[int] = None,
+) -> Tuple:
+    """Aggregate over the page's rows without loading or serializing them."""
+    page = _page(
+        _listing(db, filters, assignee_id).with_entities(Task.id, Task.version),
+        skip, limit, after_id,
+    ).subquery()
+    return tuple(
+        db.query(
+            func.count(), func.max(page.c.id), func.sum(page.c.id), func.sum(page.c.version)
+        ).one()
+    )
+
+def get_task_fingerprint(db: Session, task_id: int):
+    """The columns a single-task ETag and permission check need, without the full row."""
+    return db.query(Task.assignee_id, Task.version).filter(Task.id == task_id).first()
+
+def record_changes(db: Session, deltas: crud_task_stats.Deltas, events: List[dict]) -> None:
+    """
+    The bookkeeping of every task write, done in its transaction before the
+    commit: counter upkeep and the outbox jobs for `events`. Versions are
+    bumped by the write itself (the mapper's version_id_col, or explicitly in
+    bulk statements). Archiving uses it too, and crud_task_async runs the
+    writes below through run_sync, so every path that changes tasks shares it.
+    """
+    crud_task_stats.adjust(db, deltas)
+    crud_job.enqueue_task_events(db, events)
 
 def create_assigned_task(db: Session, obj_in: TaskCreate, assigned_by_id: int) -> Task:
+    # Every column is set here, so the INSERT is the only round trip: nothing
+    # server-generated has to be read back
     db_obj = Task(
         title=obj_in.title,
         description=obj_in.description,
         status=obj_in.status,
         assignee_id=obj_in.assignee_id,
-        assigned_by_id=assigned_by_id
+        assigned_by_id=assigned_by_id,
+        created_at=utcnow(),
+        updated_at=None,
     )
     db.add(db_obj)
+    # INSERT now so the task has its id for the event below
+    db.flush()
+    events = [task_event("created", db_obj.id, db_obj.status, db_obj.assignee_id, task=db_obj)]
+    record_changes(db, {(db_obj.status, db_obj.assignee_id): 1}, events)
     db.commit()
-    db.refresh(db_obj)
+    broker.publish(events)
     return db_obj
 
 def update_task(db: Session, db_obj: Task, obj_in: TaskUpdate) -> Task:
-    update_data = obj_in.model_dump(exclude_unset=True)
+    """
+    Apply a partial update with one `UPDATE ... WHERE id = ? AND version = ?`.
+    updated_at and the new version are computed here, so the object needs no
+    refresh afterwards.
+    Raises VersionConflict if `obj_in.version` is stale or the row changed
+    after `db_obj` was loaded.
+    """
+    if obj_in.version is not None and obj_in.version != db_obj.version:
+        raise VersionConflict()
+    update_data = obj_in.model_dump(exclude_unset=True, exclude={"version"})
+    old_key = (db_obj.status, db_obj.assignee_id)
     for field in update_data:
         setattr(db_obj, field, update_data[field])
+    # Set explicitly so the column's onupdate default isn't fetched back
+    db_obj.updated_at = utcnow()
     db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
+    try:
+        # The versioned UPDATE; raises StaleDataError if the row changed meanwhile
+        db.flush()
+        events = [task_event(
+            "updated", db_obj.id, db_obj.status, db_obj.assignee_id,
+            previous_assignee_id=old_key[1], task=db_obj,
+        )]
+        record_changes(db, crud_task_stats.moved(old_key, (db_obj.status, db_obj.assignee_id)), events)
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        raise VersionConflict()
+    broker.publish(events)
     return db_obj
 
-def remove_task(db: Session, task_id: int) -> Optional[Task]:
-    obj = db.query(Task).get(task_id)
-    if obj:
-        db.delete(obj)
+def remove_task(db: Session, task_id: int, version: Optional[int] = None):
+    """
+    Delete a task with one `DELETE ... RETURNING`, optionally only at `version`.
+    Returns the deleted row's (id, status, assignee_id, version), None if there
+    was no such task, and raises VersionConflict if it exists at another version.
+    """
+    stmt = delete(Task).where(Task.id == task_id)
+    if version is not None:
+        stmt = stmt.where(Task.version == version)
+    stmt = stmt.execution_options(synchronize_session=False)
+    columns = (Task.id, Task.status, Task.assignee_id, Task.version)
+    if db.get_bind().dialect.delete_returning:
+        row = db.execute(stmt.returning(*columns)).first()
+    else:
+        # MySQL: lock the row, then delete it
+        row = db.execute(select(*columns).where(stmt.whereclause).with_for_update()).first()
+        if row:
+            db.execute(stmt)
+    if row is None:
+        db.rollback()
+        if version is not None and db.scalar(select(Task.id).where(Task.id == task_id)) is not None:
+            raise VersionConflict()
+        return None
+    events = [task_event("deleted", row.id, row.status, row.assignee_id)]
+    record_changes(db, {(row.status, row.assignee_id): -1}, events)
+    db.commit()
+    broker.publish(events)
+    return row
+
+def _existing_user_ids(db: Session, user_ids: Iterable[int]) -> Set[int]:
+    ids = set(user_ids)
+    if not ids:
+        return set()
+    return set(db.scalars(select(User.id).where(User.id.in_(ids))))
+
+def create_bulk(db: Session, objs_in: List[TaskCreate], assigned_by_id: int) -> List[TaskBulkResult]:
+    """
+    Insert many tasks with a single multi-row INSERT in one transaction.
+    Items with an unknown assignee or invalid status are reported and skipped.
+    """
+    known_users = _existing_user_ids(db, (obj.assignee_id for obj in objs_in))
+    results = []
+    rows = []
+    now = utcnow()
+    for index, obj_in in enumerate(objs_in):
+        if obj_in.assignee_id not in known_users:
+            results.append(TaskBulkResult(index=index, ok=False, error="Assignee not found"))
+        elif obj_in.status not in TASK_STATUSES:
+            results.append(TaskBulkResult(index=index, ok=False, error="Invalid status"))
+        else:
+            result = TaskBulkResult(index=index, ok=True)
+            results.append(result)
+            rows.append((result, {
+                "title": obj_in.title,
+                "description": obj_in.description,
+                "status": obj_in.status,
+                "assignee_id": obj_in.assignee_id,
+                "assigned_by_id": assigned_by_id,
+                "created_at": now,
+            }))
+    if rows:
+        stmt = insert(Task).values([values for _, values in rows])
+        if db.get_bind().dialect.insert_returning:
+            new_ids = sorted(db.scalars(stmt.returning(Task.id)))
+        else:
+            # MySQL: lastrowid is the first id of the statement and InnoDB hands a
+            # multi-row "simple insert" a contiguous block of ids
+            first_id = db.execute(stmt).lastrowid
+            new_ids = range(first_id, first_id + len(rows))
+        for (result, _), new_id in zip(rows, new_ids):
+            result.id = new_id
+        events = [
+            task_event("created", result.id, values["status"], values["assignee_id"])
+            for result, values in rows
+        ]
+        record_changes(
+            db, Counter((values["status"], values["assignee_id"]) for _, values in rows), events
+        )
+        db.commit()
+        broker.publish(events)
+    return results
+
+def update_bulk(db: Session, objs_in: List[TaskBulkUpdate]) -> List[TaskBulkResult]:
+    """
+    Apply many partial updates with a single UPDATE ... SET col = CASE id ... statement.
+    Items for missing tasks, unknown assignees or invalid statuses are reported and skipped.
+    """
+    existing = {
+        row.id: (row.status, row.assignee_id, row.version)
+        for row in db.execute(
+            select(Task.id, Task.status, Task.assignee_id, Task.version)
+            .where(Task.id.in_({obj.id for obj in objs_in}))
+            .with_for_update()
+        )
+    }
+    known_users = _existing_user_ids(
+        db, (obj.assignee_id for obj in objs_in if obj.assignee_id is not None)
+    )
+    results = []
+    changes = {}
+    for index, obj_in in enumerate(objs_in):
+        update_data = obj_in.model_dump(exclude_unset=True, exclude={"id", "version"})
+        if obj_in.id not in existing:
+            error = "Task not found"
+        elif obj_in.version is not None and obj_in.version != existing[obj_in.id][2]:
+            error = "Version conflict"
+        elif "assignee_id" in update_data and update_data["assignee_id"] not in known_users:
+            error = "Assignee not found"
+        elif "status" in update_data and update_data["status"] not in TASK_STATUSES:
+            error = "Invalid status"
+        else:
+            error = None
+            changes.setdefault(obj_in.id, {}).update(update_data)
+        results.append(TaskBulkResult(index=index, id=obj_in.id, ok=error is None, error=error))
+    if changes:
+        fields = {field for update_data in changes.values() for field in update_data}
+        values = {
+            field: case(
+                {task_id: data[field] for task_id, data in changes.items() if field in data},
+                value=Task.id,
+                else_=getattr(Task, field),
+            )
+            for field in fields
+        }
+        db.execute(
+            update(Task)
+            .where(Task.id.in_(changes.keys()))
+            .values(updated_at=utcnow(), version=Task.version + 1, **values)
+            .execution_options(synchronize_session=False)
+        )
+        deltas = Counter()
+        events = []
+        for task_id, data in changes.items():
+            status, assignee_id, _ = existing[task_id]
+            new_status, new_assignee_id = data.get("status", status), data.get("assignee_id", assignee_id)
+            deltas.update(crud_task_stats.moved((status, assignee_id), (new_status, new_assignee_id)))
+            events.append(task_event(
+                "updated", task_id, new_status, new_assignee_id, previous_assignee_id=assignee_id
+            ))
+        record_changes(db, deltas, events)
         db.commit()
-    return obj
+        broker.publish(events)
+    return results
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+from collections import Counter
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+from app.core.clock import utcnow
+from app.core.events import broker, task_event
+from app.crud import crud_task
+from app.models.task import Task
+from app.models.task_archive import ArchivedTask
+
+# Columns copied from tasks into tasks_archive; archived_at takes its server default
+ARCHIVED_COLUMNS = (
+    "id", "title", "description", "status", "created_at", "updated_at",
+    "version", "assignee_id", "assigned_by_id",
+)
+
+def cutoff(days: float) -> datetime:
+    """Completed tasks last changed before this are archived."""
+    return utcnow() - timedelta(days=days)
+
+def _archivable(before: datetime):
+    return (Task.status == "completed", func.coalesce(Task.updated_at, Task.created_at) < before)
+
+def archive_batch(db: Session, before: datetime, batch_size: int) -> int:
+    """
+    Move up to `batch_size` completed tasks last changed before `before` from
+    tasks to tasks_archive in one short transaction. Returns how many moved.
+
+    Candidates are taken in id order through ix_tasks_status_id, and rows that
+    another transaction has locked are skipped rather than waited for; the copy
+    and the delete re-check the predicate in case a task changed in between.
+    """
+    condition = _archivable(before)
+    ids = list(db.scalars(
+        select(Task.id)
+        .where(
+            *condition,
+            # Never the newest task: SQLite would hand its id out again once
+            # the row is gone, and the archive already holds that id
+            Task.id < select(func.max(Task.id)).scalar_subquery(),
+        )
+        .order_by(Task.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ))
+    if not ids:
+        db.rollback()
+        return 0
+    condition = (Task.id.in_(ids), *condition)
+    db.execute(
+        insert(ArchivedTask).from_select(
+            ARCHIVED_COLUMNS,
+            select(*(getattr(Task, column) for column in ARCHIVED_COLUMNS)).where(*condition),
+        )
+    )
+    stmt = delete(Task).where(*condition).execution_options(synchronize_session=False)
+    columns = (Task.id, Task.status, Task.assignee_id)
+    if db.get_bind().dialect.delete_returning:
+        rows = db.execute(stmt.returning(*columns)).all()
+    else:
+        # MySQL: the candidates are locked, so the copied rows are what gets deleted
+        rows = db.execute(select(*columns).where(*condition)).all()
+        db.execute(stmt)
+    removed = Counter((row.status, row.assignee_id) for row in rows)
+    events = [task_event("archived", row.id, row.status, row.assignee_id) for row in rows]
+    crud_task.record_changes(db, {key: -count for key, count in removed.items()}, events)
+    db.commit()
+    broker.publish(events)
+    return len(rows)
@@ -0,0 +1,52 @@
+from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud import crud_task
+from app.models.task import Task
+from app.schemas.task import TaskCreate, TaskUpdate, TaskBulkUpdate, TaskBulkResult
+
+# Async counterparts of crud_task for endpoints running on deps.get_async_db.
+
+async def get_task(db: AsyncSession, task_id: int) -> Optional[Task]:
+    # A query, like crud_task.get_task: remove_task deletes with a statement, so
+    # the identity map (db.get) may still hold the deleted task
+    result = await db.execute(select(Task).where(Task.id == task_id))
+    return result.scalars().first()
+
+async def _page(db: AsyncSession, query, skip: int, limit: int, after_id: Optional[int]) -> List[Task]:
+    query = query.order_by(Task.id)
+    if after_id is not None:
+        query = query.where(Task.id > after_id)
+    elif skip:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit))
+    return list(result.scalars().all())
+
+async def get_multi(db: AsyncSession, skip: int = 0, limit: int = 100, after_id: Optional[int] = None) -> List[Task]:
+    return await _page(db, select(Task), skip, limit, after_id)
+
+async def get_multi_by_assignee(
+    db: AsyncSession, assignee_id: int, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
+) -> List[Task]:
+    return await _page(db, select(Task).where(Task.assignee_id == assignee_id), skip, limit, after_id)
+
+# Writes run crud_task's implementation on the session's sync facade (run_sync,
+# still non-blocking), so counters, versions and outbox jobs are kept exactly
+# as on the sync path. Raises crud_task.VersionConflict like it.
+
+async def create_assigned_task(db: AsyncSession, obj_in: TaskCreate, assigned_by_id: int) -> Task:
+    return await db.run_sync(crud_task.create_assigned_task, obj_in, assigned_by_id)
+
+async def update_task(db: AsyncSession, db_obj: Task, obj_in: TaskUpdate) -> Task:
+    return await db.run_sync(crud_task.update_task, db_obj, obj_in)
+
+async def remove_task(db: AsyncSession, task_id: int, version: Optional[int] = None):
+    return await db.run_sync(crud_task.remove_task, task_id, version)
+
+async def create_bulk(
+    db: AsyncSession, objs_in: List[TaskCreate], assigned_by_id: int
+) -> List[TaskBulkResult]:
+    return await db.run_sync(crud_task.create_bulk, objs_in, assigned_by_id)
+
+async def update_bulk(db: AsyncSession, objs_in: List[TaskBulkUpdate]) -> List[TaskBulkResult]:
+    return await db.run_sync(crud_task.update_bulk, objs_in)
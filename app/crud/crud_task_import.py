@@ -0,0 +1,117 @@
+import logging
+from itertools import islice
+from typing import BinaryIO, Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.importer import iter_records
+from app.crud import crud_task, crud_user
+from app.schemas.task import TaskCreate, TaskImportError, TaskImportResult
+
+logger = logging.getLogger(__name__)
+
+def _resolve_assignees(db: Session, records: List[Tuple[int, dict]], cache: TTLCache) -> None:
+    """Resolve every `assignee` reference in the chunk with at most one query."""
+    pending = {
+        str(record["assignee"]) for _, record in records
+        if "assignee_id" not in record and "assignee" in record and cache.get(str(record["assignee"])) is None
+    }
+    if not pending:
+        return
+    found = crud_user.get_user_ids_by_reference(db, pending)
+    for reference in pending:
+        # 0 marks a reference we already know to be unknown
+        cache.set(reference, found.get(reference, 0))
+
+def _to_task(record: dict, cache: TTLCache) -> TaskCreate:
+    if "assignee_id" not in record and "assignee" in record:
+        assignee_id = cache.get(str(record["assignee"]))
+        if not assignee_id:
+            raise ValueError("Assignee not found")
+        record = {**record, "assignee_id": assignee_id}
+    return TaskCreate.model_validate(record)
+
+def _format_error(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(
+            f"{'.'.join(map(str, error['loc'])) or 'row'}: {error['msg']}" for error in exc.errors()
+        )
+    return str(exc)
+
+def iter_import(
+    db: Session,
+    raw: BinaryIO,
+    fmt: str,
+    assigned_by_id: int,
+    chunk_size: int,
+    max_errors: int,
+) -> Iterator[TaskImportResult]:
+    """
+    Import tasks from a CSV/NDJSON upload, committing one bulk INSERT per chunk.
+    Rows name their assignee by `assignee_id` or by `assignee` (email or username).
+    At most `max_errors` per-row errors are kept in the result.
+    Yields the running result (one object, updated in place) after every
+    committed chunk, and once for an empty upload.
+    """
+    result = TaskImportResult(rows=0, inserted=0, failed=0, chunks=0, errors=[])
+    assignees = TTLCache(maxsize=10000, ttl=3600)
+    records = iter_records(raw, fmt)
+
+    def fail(line_no: int, error: str) -> None:
+        result.failed += 1
+        if len(result.errors) < max_errors:
+            result.errors.append(TaskImportError(row=line_no, error=error))
+        else:
+            result.errors_truncated = True
+
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+        result.rows += len(chunk)
+        parsed = []
+        for line_no, record in chunk:
+            if isinstance(record, str):
+                fail(line_no, record)
+            else:
+                parsed.append((line_no, record))
+        _resolve_assignees(db, parsed, assignees)
+
+        line_numbers: List[int] = []
+        tasks_in: List[TaskCreate] = []
+        for line_no, record in parsed:
+            try:
+                tasks_in.append(_to_task(record, assignees))
+                line_numbers.append(line_no)
+            except (ValidationError, ValueError) as exc:
+                fail(line_no, _format_error(exc))
+
+        if tasks_in:
+            for item in crud_task.create_bulk(db, objs_in=tasks_in, assigned_by_id=assigned_by_id):
+                if item.ok:
+                    result.inserted += 1
+                else:
+                    fail(line_numbers[item.index], item.error)
+        result.chunks += 1
+        logger.info(
+            "Task import progress: %d rows read, %d inserted, %d failed",
+            result.rows, result.inserted, result.failed,
+        )
+        yield result
+    if not result.chunks:
+        yield result
+
+def import_tasks(
+    db: Session,
+    raw: BinaryIO,
+    fmt: str,
+    assigned_by_id: int,
+    chunk_size: int,
+    max_errors: int,
+) -> TaskImportResult:
+    """Run iter_import to the end and return its result."""
+    for result in iter_import(db, raw, fmt, assigned_by_id, chunk_size, max_errors):
+        pass
+    return result
@@ -0,0 +1,75 @@
+from collections import Counter
+from typing import Dict, Optional, Tuple
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.orm import Session
+from app.models.task import Task
+from app.models.task_counter import TaskCounter
+from app.schemas.task import TaskStats, TaskAssigneeStats
+
+CounterKey = Tuple[str, Optional[int]]
+Deltas = Dict[CounterKey, int]
+
+def adjust(db: Session, deltas: Deltas) -> None:
+    """
+    Add `deltas` to the counters with a single upsert. Does not commit: callers
+    run this inside the transaction that writes the tasks themselves.
+    """
+    rows = [
+        {"status": status, "assignee_id": assignee_id or 0, "count": delta}
+        for (status, assignee_id), delta in deltas.items()
+        if delta
+    ]
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(TaskCounter).values(rows)
+        stmt = stmt.on_duplicate_key_update(count=TaskCounter.count + stmt.inserted.count)
+    else:
+        stmt = (sqlite_insert if dialect == "sqlite" else postgresql_insert)(TaskCounter).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[TaskCounter.status, TaskCounter.assignee_id],
+            set_={"count": TaskCounter.count + stmt.excluded.count},
+        )
+    db.execute(stmt)
+
+def moved(old: CounterKey, new: CounterKey) -> Deltas:
+    """Deltas for a task whose (status, assignee) changed from `old` to `new`."""
+    deltas = Counter({old: -1})
+    deltas[new] += 1
+    return deltas
+
+def get_stats(db: Session, assignee_id: Optional[int] = None) -> TaskStats:
+    query = select(TaskCounter.assignee_id, TaskCounter.status, TaskCounter.count).where(
+        TaskCounter.count != 0
+    )
+    if assignee_id is not None:
+        query = query.where(TaskCounter.assignee_id == assignee_id)
+    by_status: Dict[str, int] = {}
+    by_assignee: Dict[int, TaskAssigneeStats] = {}
+    for row in db.execute(query.order_by(TaskCounter.assignee_id)):
+        by_status[row.status] = by_status.get(row.status, 0) + row.count
+        entry = by_assignee.setdefault(
+            row.assignee_id, TaskAssigneeStats(assignee_id=row.assignee_id, total=0, by_status={})
+        )
+        entry.by_status[row.status] = row.count
+        entry.total += row.count
+    return TaskStats(
+        total=sum(by_status.values()), by_status=by_status, by_assignee=list(by_assignee.values())
+    )
+
+def rebuild(db: Session) -> int:
+    """Recompute every counter from the tasks table in one transaction. Returns the row count."""
+    assignee = func.coalesce(Task.assignee_id, 0)
+    db.execute(delete(TaskCounter))
+    db.execute(
+        insert(TaskCounter).from_select(
+            ["status", "assignee_id", "count"],
+            select(Task.status, assignee, func.count()).group_by(Task.status, assignee),
+        )
+    )
+    db.commit()
+    return db.scalar(select(func.count()).select_from(TaskCounter))
@@ -0,0 +1,126 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.core.clock import utcnow
+from app.core.config import settings
+from app.core.security import create_refresh_token, hash_token
+from app.models.token import RefreshToken, RevokedToken
+
+def _add_refresh_token(
+    db: Session, user_id: int, family_id: str, access_jti: str, access_expires_at: datetime
+) -> str:
+    token = create_refresh_token()
+    db.add(RefreshToken(
+        token_hash=hash_token(token),
+        family_id=family_id,
+        user_id=user_id,
+        access_jti=access_jti,
+        access_expires_at=access_expires_at,
+        expires_at=utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    return token
+
+def issue_refresh_token(db: Session, user_id: int, access_jti: str, access_expires_at: datetime) -> str:
+    """Start a new session (token family) for a password login."""
+    token = _add_refresh_token(db, user_id, uuid.uuid4().hex, access_jti, access_expires_at)
+    db.commit()
+    return token
+
+def rotate_refresh_token(
+    db: Session, token: str, access_jti: str, access_expires_at: datetime
+) -> Tuple[Optional[int], Optional[str], List[str]]:
+    """
+    Exchange a refresh token for a new one in the same family. Returns
+    (user_id, new token, revoked jtis): (None, None, []) if the token is unknown,
+    expired or revoked, and (None, None, jtis) if it was already used, in which
+    case someone replayed it and the whole family is revoked.
+    """
+    now = utcnow()
+    row = db.execute(
+        select(
+            RefreshToken.id, RefreshToken.family_id, RefreshToken.user_id,
+            RefreshToken.expires_at, RefreshToken.revoked_at,
+        ).where(RefreshToken.token_hash == hash_token(token))
+    ).first()
+    if row is None or row.revoked_at is not None or row.expires_at <= now:
+        db.rollback()
+        return None, None, []
+    # Conditional, so of two concurrent exchanges of one token only one wins
+    claimed = db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == row.id, RefreshToken.used_at.is_(None), RefreshToken.revoked_at.is_(None))
+        .values(used_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        db.rollback()
+        return None, None, revoke_family(db, row.family_id)
+    new_token = _add_refresh_token(db, row.user_id, row.family_id, access_jti, access_expires_at)
+    db.commit()
+    return row.user_id, new_token, []
+
+def get_family_id(db: Session, token: str) -> Optional[str]:
+    return db.scalar(select(RefreshToken.family_id).where(RefreshToken.token_hash == hash_token(token)))
+
+def _deny(db: Session, tokens: List[Tuple[str, datetime]]) -> None:
+    rows = [{"jti": jti, "expires_at": expires_at} for jti, expires_at in tokens]
+    if not rows:
+        return
+    # Revoking a token twice is not an error
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(RevokedToken).values(rows).prefix_with("IGNORE")
+    else:
+        stmt = (sqlite_insert if dialect == "sqlite" else postgresql_insert)(RevokedToken).values(rows)
+        stmt = stmt.on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+    db.execute(stmt)
+
+def revoke_access_token(db: Session, jti: str, expires_at: datetime) -> List[str]:
+    _deny(db, [(jti, expires_at)])
+    db.commit()
+    return [jti]
+
+def revoke_family(db: Session, family_id: str) -> List[str]:
+    """
+    Revoke every refresh token of a session and the access tokens still valid
+    that were issued with them. Returns the revoked access token ids.
+    """
+    now = utcnow()
+    access_tokens = db.execute(
+        select(RefreshToken.access_jti, RefreshToken.access_expires_at).where(
+            RefreshToken.family_id == family_id,
+            RefreshToken.access_jti.is_not(None),
+            RefreshToken.access_expires_at > now,
+        )
+    ).all()
+    db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    _deny(db, [tuple(token) for token in access_tokens])
+    db.commit()
+    return [token.access_jti for token in access_tokens]
+
+def is_revoked(db: Session, jti: str) -> bool:
+    return db.scalar(select(RevokedToken.id).where(RevokedToken.jti == jti)) is not None
+
+def get_revoked_since(db: Session, since: Optional[datetime]) -> List[Tuple[str, datetime]]:
+    """Unexpired revocations recorded at or after `since` (all of them for None), as (jti, revoked_at)."""
+    query = select(RevokedToken.jti, RevokedToken.revoked_at).where(RevokedToken.expires_at > utcnow())
+    if since is not None:
+        query = query.where(RevokedToken.revoked_at >= since)
+    return db.execute(query).all()
+
+def purge_expired(db: Session) -> None:
+    """Drop revocations and refresh tokens past their expiry; they can't be used anyway."""
+    now = utcnow()
+    db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+    db.execute(delete(RefreshToken).where(RefreshToken.expires_at <= now))
+    db.commit()
@@ -1,7 +1,57 @@
-from sqlalchemy.orm import Session
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+from sqlalchemy import event, or_, select
+from sqlalchemy.orm import Session, object_session
 from app.models.user import User
-from app.schemas.user import UserCreate
-from app.core.security import get_password_hash, verify_password
+from app.schemas.user import UserCreate, Principal
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.ratelimit import store as login_store
+from app.core.security import get_password_hash, verify_and_update_password
+
+# Principals resolved by deps.get_current_user, keyed by user id
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_principal(mapper, connection, target: User) -> None:
+    # Any ORM change to a user (role, email, deactivation...) drops its cached principal
+    principal_cache.invalidate(target.id)
+
+# Emails found not to exist are only remembered in a store every worker
+# shares: in a per-worker store, the entry would outlive a registration
+# handled by another worker and keep rejecting the new user's logins
+NEGATIVE_CACHE_ENABLED = (
+    settings.LOGIN_RATE_LIMIT_BACKEND == "redis" and settings.LOGIN_NEGATIVE_CACHE_TTL_SECONDS > 0
+)
+
+@event.listens_for(User, "after_insert")
+def _registered(mapper, connection, target: User) -> None:
+    if NEGATIVE_CACHE_ENABLED:
+        object_session(target).info.setdefault("registered_emails", set()).add(target.email)
+
+@event.listens_for(Session, "after_commit")
+def _forget_unknown_emails(session) -> None:
+    # After the commit, so a login racing the registration can't cache the miss again
+    for email in session.info.pop("registered_emails", ()):
+        login_store.delete(_unknown_email_key(email))
+
+@event.listens_for(Session, "after_rollback")
+def _forget_registrations(session) -> None:
+    session.info.pop("registered_emails", None)
+
+def get_principal(db: Session, user_id: int) -> Optional[Principal]:
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        user = db.get(User, user_id)
+        if user is None:
+            return None
+        principal = Principal.model_validate(user)
+        principal_cache.set(user_id, principal)
+    return principal
 
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
@@ -9,6 +59,23 @@ def get_user_by_email(db: Session, email: str):
 def get_user_by_username(db: Session, username: str):
     return db.query(User).filter(User.custom_username == username).first()
 
+def get_user_ids_by_reference(db: Session, references: Iterable[str]) -> Dict[str, int]:
+    """Map emails and/or usernames to user ids with a single query."""
+    references = set(references)
+    if not references:
+        return {}
+    rows = db.execute(
+        select(User.id, User.email, User.custom_username).where(
+            or_(User.email.in_(references), User.custom_username.in_(references))
+        )
+    )
+    found = {}
+    for row in rows:
+        for reference in (row.email, row.custom_username):
+            if reference in references:
+                found[reference] = row.id
+    return found
+
 def create_user(db: Session, obj_in: UserCreate):
     db_obj = User(
         email=obj_in.email,
@@ -21,13 +88,72 @@ def create_user(db: Session, obj_in: UserCreate):
     db.refresh(db_obj)
     return db_obj
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(User).offset(skip).limit(limit).all()
+def get_users(db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None):
+    query = db.query(User).order_by(User.id)
+    if after_id is not None:
+        query = query.filter(User.id > after_id)
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+# Running average of a password verification; logins for unknown emails are
+# delayed by it so response times don't reveal which emails are registered
+_verify_seconds = 0.0
+
+@lru_cache
+def _dummy_hash() -> str:
+    return get_password_hash("not a real password")
+
+def timed_verify(password: str, hashed_password: str):
+    """verify_and_update_password, recording how long it took for unknown-email rejections."""
+    global _verify_seconds
+    started = time.perf_counter()
+    result = verify_and_update_password(password, hashed_password)
+    elapsed = time.perf_counter() - started
+    _verify_seconds = elapsed if not _verify_seconds else 0.9 * _verify_seconds + 0.1 * elapsed
+    return result
+
+def unknown_email_delay() -> float:
+    """Seconds an unknown email's rejection should take; 0 until a verification was timed."""
+    return _verify_seconds
+
+def reject_unknown_email() -> None:
+    if not _verify_seconds:
+        # No timing sample yet: pay for one real verification
+        timed_verify("not a real password", _dummy_hash())
+    else:
+        time.sleep(_verify_seconds)
+
+def _unknown_email_key(email: str) -> str:
+    return f"unknown-email:{email}"
+
+def is_cached_unknown_email(email: str) -> bool:
+    return NEGATIVE_CACHE_ENABLED and login_store.get(_unknown_email_key(email)) is not None
+
+def remember_unknown_email(email: str) -> None:
+    if NEGATIVE_CACHE_ENABLED:
+        login_store.set(_unknown_email_key(email), 1, settings.LOGIN_NEGATIVE_CACHE_TTL_SECONDS)
 
 def authenticate(db: Session, email: str, password: str):
+    """
+    Check credentials. Unknown emails are rejected in about the time a real
+    verification takes. With a shared store (NEGATIVE_CACHE_ENABLED) they are
+    also remembered for LOGIN_NEGATIVE_CACHE_TTL_SECONDS and rejected without
+    a lookup. crud_user_async.authenticate shares this handling.
+    """
+    if is_cached_unknown_email(email):
+        reject_unknown_email()
+        return None
     user = get_user_by_email(db, email)
     if not user:
+        remember_unknown_email(email)
+        reject_unknown_email()
         return None
-    if not verify_password(password, user.hashed_password):
+    verified, new_hash = timed_verify(password, user.hashed_password)
+    if not verified:
         return None
+    if new_hash:
+        # Stored hash predates the configured bcrypt cost; upgrade it transparently
+        user.hashed_password = new_hash
+        db.commit()
     return user
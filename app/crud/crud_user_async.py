@@ -0,0 +1,80 @@
+import asyncio
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.models.user import User
+from app.schemas.user import UserCreate, Principal
+from app.core.security import get_password_hash
+from app.crud import crud_user
+from app.crud.crud_user import principal_cache
+
+# Async counterparts of crud_user for endpoints running on deps.get_async_db.
+# bcrypt is CPU bound, so hashing is pushed off the event loop.
+
+async def get_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    return await db.get(User, user_id)
+
+async def get_principal(db: AsyncSession, user_id: int) -> Optional[Principal]:
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        user = await db.get(User, user_id)
+        if user is None:
+            return None
+        principal = Principal.model_validate(user)
+        principal_cache.set(user_id, principal)
+    return principal
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
+
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+    result = await db.execute(select(User).where(User.custom_username == username))
+    return result.scalars().first()
+
+async def create_user(db: AsyncSession, obj_in: UserCreate) -> User:
+    db_obj = User(
+        email=obj_in.email,
+        custom_username=obj_in.custom_username,
+        hashed_password=await run_in_threadpool(get_password_hash, obj_in.password),
+        role=obj_in.role if obj_in.role else "staff",
+    )
+    db.add(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
+    return db_obj
+
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100, after_id: Optional[int] = None):
+    query = select(User).order_by(User.id)
+    if after_id is not None:
+        query = query.where(User.id > after_id)
+    elif skip:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit))
+    return result.scalars().all()
+
+async def _reject_unknown_email() -> None:
+    delay = crud_user.unknown_email_delay()
+    if delay:
+        await asyncio.sleep(delay)
+    else:
+        await run_in_threadpool(crud_user.reject_unknown_email)
+
+async def authenticate(db: AsyncSession, email: str, password: str) -> Optional[User]:
+    """Check credentials, handling unknown emails like crud_user.authenticate."""
+    if crud_user.is_cached_unknown_email(email):
+        await _reject_unknown_email()
+        return None
+    user = await get_user_by_email(db, email)
+    if not user:
+        crud_user.remember_unknown_email(email)
+        await _reject_unknown_email()
+        return None
+    verified, new_hash = await run_in_threadpool(crud_user.timed_verify, password, user.hashed_password)
+    if not verified:
+        return None
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    return user
@@ -3,3 +3,7 @@
 from app.db.base_class import Base  # noqa
 from app.models.user import User  # noqa
 from app.models.task import Task  # noqa
+from app.models.task_counter import TaskCounter  # noqa
+from app.models.task_archive import ArchivedTask  # noqa
+from app.models.job import Job  # noqa
+from app.models.token import RefreshToken, RevokedToken  # noqa
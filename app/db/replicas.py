@@ -0,0 +1,183 @@
+"""
+Read-replica routing.
+
+deps.get_db sends GET/HEAD requests to a replica and everything else to the
+primary. A user who just committed a write is pinned to the primary for
+REPLICA_STICKY_SECONDS so they read their own writes despite replication lag.
+Who wrote recently is kept in a backend: "memory" only covers the worker that
+handled the write, "redis" shares it across workers. A replica whose
+connection or query fails is skipped for REPLICA_RETRY_SECONDS and its reads
+fail over to the primary; the request that finds it unreachable is served by
+the primary too, since its connection is checked out before the endpoint runs.
+"""
+import itertools
+import logging
+import threading
+import time
+from functools import partial
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import CounterMetric, instrument_engine, register
+from app.db.session import SessionLocal, _pool_options, ping_idle_connections
+
+logger = logging.getLogger(__name__)
+
+replica_failovers = register(CounterMetric(
+    "db_replica_failovers_total", "Reads sent to the primary because a replica was unavailable"
+))
+
+
+class ReplicaSet:
+    def __init__(self, urls: List[str], retry_after: float):
+        self.engines: List[Engine] = []
+        for url in urls:
+            engine = create_engine(url, **_pool_options(url))
+            if settings.DB_POOL_PRE_PING == "idle":
+                ping_idle_connections(engine, settings.DB_POOL_PRE_PING_IDLE_SECONDS)
+            instrument_engine(engine, pool_gauges=False)
+            event.listen(engine, "handle_error", partial(self._failed, len(self.engines)))
+            self.engines.append(engine)
+        self.retry_after = retry_after
+        self._down_until: Dict[int, float] = {}
+        self._next = itertools.cycle(range(len(self.engines)))
+        self._lock = threading.Lock()
+
+    def _failed(self, index: int, context) -> None:
+        # Connection failures, including a failed connect, mark the replica down
+        # for the requests after this one; errors in the statement itself don't
+        if not (context.is_disconnect or isinstance(context.sqlalchemy_exception, exc.OperationalError)):
+            return
+        logger.warning(
+            "Replica %s unavailable; reading from the primary for %ss",
+            make_url(self.engines[index].url).render_as_string(hide_password=True), self.retry_after,
+            exc_info=context.original_exception,
+        )
+        with self._lock:
+            self._down_until[index] = time.monotonic() + self.retry_after
+
+    def pick(self) -> Optional[Engine]:
+        """
+        The next healthy replica (round robin), or None if all of them are down
+        and the caller should use the primary. Nothing is checked here: a
+        replica is only marked down when a real connection or query fails.
+        """
+        now = time.monotonic()
+        with self._lock:
+            for _ in range(len(self.engines)):
+                index = next(self._next)
+                if self._down_until.get(index, 0) <= now:
+                    return self.engines[index]
+        replica_failovers.inc()
+        return None
+
+    def session(self) -> Optional[Session]:
+        """
+        A session on the next healthy replica with its connection already
+        checked out (the request's first query would do that anyway), or None
+        if there is none to use and the caller should read from the primary.
+        """
+        replica = self.pick()
+        if replica is None:
+            return None
+        db = SessionLocal(bind=replica)
+        try:
+            db.connection()
+        except exc.OperationalError:
+            # _failed has marked the replica down
+            db.close()
+            replica_failovers.inc()
+            return None
+        db.info["replica"] = True
+        return db
+
+
+def _replica_urls() -> List[str]:
+    return [url.strip() for url in (settings.DATABASE_REPLICA_URLS or "").split(",") if url.strip()]
+
+
+_urls = _replica_urls()
+# None when no replicas are configured: every request then uses the primary
+replicas: Optional[ReplicaSet] = ReplicaSet(_urls, settings.REPLICA_RETRY_SECONDS) if _urls else None
+
+class MemoryWriters:
+    """Recent writers seen by this process; enough for a single worker."""
+
+    def __init__(self, ttl: float):
+        self._subjects = TTLCache(maxsize=100_000, ttl=ttl)
+
+    def add(self, subject: str) -> None:
+        self._subjects.set(subject, True)
+
+    def __contains__(self, subject: str) -> bool:
+        return self._subjects.get(subject) is not None
+
+
+class RedisWriters:
+    """Recent writers shared by all workers: one expiring key per subject."""
+
+    def __init__(self, url: str, ttl: float, prefix: str = "replica-sticky"):
+        import redis  # optional dependency, only needed for this backend
+
+        self._client = redis.Redis.from_url(url)
+        self._ttl_ms = int(ttl * 1000)
+        self._prefix = prefix
+
+    def add(self, subject: str) -> None:
+        self._client.set(f"{self._prefix}:{subject}", 1, px=self._ttl_ms)
+
+    def __contains__(self, subject: str) -> bool:
+        return bool(self._client.exists(f"{self._prefix}:{subject}"))
+
+
+def _writers_from_settings():
+    if settings.REPLICA_STICKY_BACKEND == "redis":
+        return RedisWriters(settings.REPLICA_STICKY_REDIS_URL, settings.REPLICA_STICKY_SECONDS)
+    if settings.WEB_CONCURRENCY > 1:
+        logger.warning(
+            "REPLICA_STICKY_BACKEND=memory with %d workers: a user's reads only see their own "
+            "writes on the worker that made them; set REPLICA_STICKY_BACKEND=redis",
+            settings.WEB_CONCURRENCY,
+        )
+    return MemoryWriters(settings.REPLICA_STICKY_SECONDS)
+
+
+# Subjects (user ids) that wrote recently and must read from the primary
+recent_writers = _writers_from_settings() if replicas is not None else None
+
+
+def on_replica(db: Session) -> bool:
+    """Whether deps.get_db bound `db` to a replica, whose reads may lag the primary."""
+    return db.info.get("replica", False)
+
+
+def reads_from_primary(subject: Optional[str]) -> bool:
+    if subject is None or recent_writers is None:
+        return False
+    try:
+        return subject in recent_writers
+    except Exception:
+        # The primary is always up to date
+        logger.exception("Failed to look up recent writes; reading from the primary")
+        return True
+
+
+def stick_to_primary(subject: Optional[str]) -> None:
+    """Route `subject`'s reads to the primary for the next REPLICA_STICKY_SECONDS."""
+    if subject is None or recent_writers is None:
+        return
+    try:
+        recent_writers.add(str(subject))
+    except Exception:
+        logger.exception("Failed to record a write for %s; their next reads may lag", subject)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _stick_after_commit(session) -> None:
+    # deps.get_db tags primary sessions with the caller's token subject
+    stick_to_primary(session.info.get("subject"))
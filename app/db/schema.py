@@ -0,0 +1,92 @@
+"""
+Schema management on top of the Alembic migrations in alembic/versions.
+
+The application never creates tables itself. At startup it only compares the
+database's revision with the newest migration (SCHEMA_MODE=check), or applies
+pending migrations first (SCHEMA_MODE=upgrade, for single-process setups).
+"""
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+# Alembic is imported inside the functions below: only `migrate` needs most of
+# it, and keeping it off the import path keeps worker cold starts short.
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+VERSIONS_DIR = ALEMBIC_INI.parent / "alembic" / "versions"
+
+_HEADER = re.compile(r"^(down_revision|revision)\s*=\s*(.+)$", re.MULTILINE)
+_QUOTED = re.compile(r"[\"']([\w]+)[\"']")
+
+SCHEMA_MODES = ("check", "upgrade", "off")
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+def alembic_config():
+    from alembic.config import Config
+
+    config = Config(str(ALEMBIC_INI))
+    # Keep the application's logging setup when migrating from inside it
+    config.attributes["configure_logger"] = False
+    return config
+
+
+@lru_cache()
+def head_revision() -> Optional[str]:
+    """
+    Newest migration shipped with the code. Read straight from the revision
+    headers of the scripts, which is much cheaper than loading Alembic's
+    script directory; `alembic heads` gives the same answer.
+    """
+    revisions, parents = set(), set()
+    for path in VERSIONS_DIR.glob("*.py"):
+        header = {key: _QUOTED.findall(value) for key, value in _HEADER.findall(path.read_text())}
+        revisions.update(header.get("revision", ()))
+        # A merge revision lists several parents
+        parents.update(header.get("down_revision", ()))
+    heads = revisions - parents
+    if len(heads) > 1:
+        raise SchemaOutOfDate(f"Migrations have several heads ({', '.join(sorted(heads))}); merge them")
+    return heads.pop() if heads else None
+
+
+def current_revision(engine: Engine) -> Optional[str]:
+    with engine.connect() as connection:
+        if not inspect(connection).has_table("alembic_version"):
+            return None
+        return connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+
+def check(engine: Engine) -> None:
+    current, head = current_revision(engine), head_revision()
+    if current != head:
+        raise SchemaOutOfDate(
+            f"Database schema is at revision {current or 'none'}, the application expects "
+            f"{head}. Run `python -m app.cli migrate` first."
+        )
+
+
+def upgrade(engine: Engine, revision: str = "head") -> None:
+    from alembic import command
+
+    config = alembic_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
+
+
+def ensure(engine: Engine, mode: str) -> None:
+    """Apply SCHEMA_MODE at startup."""
+    if mode == "upgrade":
+        upgrade(engine)
+    elif mode == "check":
+        check(engine)
+    elif mode != "off":
+        raise ValueError(f"SCHEMA_MODE must be one of {', '.join(SCHEMA_MODES)}, not {mode!r}")
@@ -1,10 +1,96 @@
-from sqlalchemy import create_engine
+import time
+from functools import lru_cache
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from app.core.capacity import resolve_pool
 from app.core.config import settings
+from app.core.metrics import TimedQueuePool, instrument_engine
+
+PRE_PING_MODES = ("always", "idle", "never")
+
+def _is_memory_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+def _pool_options(url: str) -> dict:
+    if settings.DB_POOL_PRE_PING not in PRE_PING_MODES:
+        raise ValueError(f"DB_POOL_PRE_PING must be one of {', '.join(PRE_PING_MODES)}")
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING == "always",
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    if not _is_memory_sqlite(url):
+        plan = resolve_pool(settings)
+        options.update(
+            pool_size=plan.pool_size,
+            max_overflow=plan.max_overflow,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    return options
+
+def ping_idle_connections(engine: Engine, idle_seconds: float) -> None:
+    """
+    Pre-ping only connections that sat in the pool for `idle_seconds` or more,
+    rather than paying a round trip on every checkout. A failed ping makes the
+    pool replace the connection, as pool_pre_ping would.
+    """
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        except Exception:
+            raise exc.DisconnectionError()
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
 
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600
+    # In-memory SQLite needs its single-connection pool; everything else gets a timed QueuePool
+    poolclass=None if _is_memory_sqlite(settings.DATABASE_URL) else TimedQueuePool,
+    **_pool_options(settings.DATABASE_URL)
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if settings.DB_POOL_PRE_PING == "idle":
+    ping_idle_connections(engine, settings.DB_POOL_PRE_PING_IDLE_SECONDS)
+instrument_engine(engine)
+# Objects stay loaded after commit; writes set every column they change themselves
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Async drivers matching the sync ones we accept in DATABASE_URL
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(url: str) -> str:
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+@lru_cache
+def get_async_engine() -> AsyncEngine:
+    # Built on first use so importing this module never requires the async driver.
+    # Its pool is sized like the sync one but separate from it: a worker that
+    # serves async endpoints too can hold twice its share of DB_MAX_CONNECTIONS.
+    url = settings.ASYNC_DATABASE_URL or to_async_url(settings.DATABASE_URL)
+    async_engine = create_async_engine(url, **_pool_options(url))
+    if settings.DB_POOL_PRE_PING == "idle":
+        ping_idle_connections(async_engine.sync_engine, settings.DB_POOL_PRE_PING_IDLE_SECONDS)
+    return async_engine
+
+# Bound per session in deps.get_async_db; objects stay usable after commit
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
@@ -1,32 +1,152 @@
-from fastapi import FastAPI
+import time
+
+# Start of the worker's cold start: everything below (and its imports) is measured
+_import_started = time.perf_counter()
+
+import logging
+from contextlib import asynccontextmanager
+from anyio import to_thread
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.api_v1.api import api_router
-from app.db.session import engine
-from app.db.base import Base
+from app.db import schema
+from app.db.session import SessionLocal, engine
+from app.core.archiver import archiver_from_settings
+from app.core.capacity import resolve_pool
 from app.core.config import settings
+from app.core import jobs, metrics
+from app.core.events import broker
+from app.core.revocation import denylist
+from app.core.hashing import HashingPoolBusy
+from app.core.security import password_hasher
+from app.core.serialization import ORJSONResponse
+from app.crud import crud_job
+
+logger = logging.getLogger(__name__)
+
+# Seconds spent in each cold-start phase of this worker, exported at /metrics
+startup_timings = {}
+
+for _phase in ("import", "build", "schema", "total"):
+    metrics.register(metrics.GaugeCallback(
+        f"app_startup_{_phase}_seconds",
+        f"Worker cold start: seconds spent in the {_phase} phase",
+        lambda phase=_phase: startup_timings[phase],
+    ))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Database access at startup: compare (or upgrade) the schema revision, then
+    # load the revoked token ids
+    started = time.perf_counter()
+    schema.ensure(engine, settings.SCHEMA_MODE)
+    startup_timings["schema"] = time.perf_counter() - started
+    denylist.start()
+    # Threads serving sync endpoints; must be set from inside the event loop
+    threadpool_tokens = resolve_pool(settings).threadpool_tokens
+    if threadpool_tokens:
+        to_thread.current_default_thread_limiter().total_tokens = threadpool_tokens
+    # Logins wait for bcrypt in those threads; keep them from taking all of them
+    password_hasher.start(int(to_thread.current_default_thread_limiter().total_tokens))
+    startup_timings["total"] = time.perf_counter() - _import_started
+    logger.info(
+        "Worker ready in %.3fs (import %.3fs, build %.3fs, schema %s %.3fs)",
+        startup_timings["total"], startup_timings["import"], startup_timings["build"],
+        settings.SCHEMA_MODE, startup_timings["schema"],
+    )
+    archiver = archiver_from_settings(SessionLocal) if settings.ARCHIVE_ENABLED else None
+    if archiver is not None:
+        archiver.start()
+    # Nothing is ever enqueued without a configured job kind, so don't poll for it
+    if settings.JOBS_WORKERS > 0 and crud_job.TASK_EVENT_JOBS:
+        jobs.start(SessionLocal)
+    yield
+    jobs.stop()
+    if archiver is not None:
+        archiver.stop()
+    denylist.stop()
+    broker.close()
+    password_hasher.shutdown()
+
+def create_app() -> FastAPI:
+    """
+    Build the application. No database access happens here; the schema check
+    runs in the lifespan handler once the server starts the app.
+    """
+    started = time.perf_counter()
+    startup_timings.setdefault("import", started - _import_started)
+    app = FastAPI(
+        title="Task Management System API",
+        description="API for managing users and tasks",
+        version="1.0.0",
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan,
+    )
+    _configure(app)
+    startup_timings["build"] = time.perf_counter() - started
+    return app
+
+def _configure(app: FastAPI) -> None:
+    # Configure CORS (Cross-Origin Resource Sharing)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:5173", "http://127.0.0.1:5173"],
+        allow_origin_regex=r"https?://(localhost|127\.0\.0\.1):5173",
+        allow_credentials=True,
+        allow_methods=["*"],  # Allows all methods
+        allow_headers=["*"],  # Allows all headers
+        expose_headers=["X-Next-Cursor", "ETag"],  # Lets the frontend read cursors and ETags
+    )
+
+    if settings.METRICS_ENABLED:
+        @app.middleware("http")
+        async def record_request_metrics(request: Request, call_next):
+            stats = metrics.begin_request()
+            start = time.perf_counter()
+            status_code = 500
+            try:
+                response = await call_next(request)
+                status_code = response.status_code
+                return response
+            finally:
+                metrics.end_request(
+                    stats,
+                    request.method,
+                    metrics.route_label(request.scope),
+                    status_code,
+                    time.perf_counter() - start,
+                    settings.N_PLUS_ONE_THRESHOLD,
+                )
+
+        @app.get("/metrics", include_in_schema=False)
+        def read_metrics():
+            return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+    @app.exception_handler(HashingPoolBusy)
+    def hashing_pool_busy_handler(request: Request, exc: HashingPoolBusy):
+        # Shed login/registration bursts early rather than letting them pile up
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Authentication is busy, please retry shortly"},
+            headers={"Retry-After": "1"},
+        )
+
+    @app.get("/", tags=["Root"])
+    def root():
+        return {"message": "Welcome to the Task Management System API. Visit /docs for documentation."}
+
+    # Include API routers
+    app.include_router(api_router, prefix=settings.API_V1_STR)
+
+_app = None
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(
-    title="Task Management System API",
-    description="API for managing users and tasks",
-    version="1.0.0"
-)
-
-# Configure CORS (Cross-Origin Resource Sharing)
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:5173", "http://127.0.0.1:5173"],
-    allow_origin_regex=r"https?://(localhost|127\.0\.0\.1):5173",
-    allow_credentials=True,
-    allow_methods=["*"],  # Allows all methods
-    allow_headers=["*"],  # Allows all headers
-)
-
-@app.get("/", tags=["Root"])
-def root():
-    return {"message": "Welcome to the Task Management System API. Visit /docs for documentation."}
-
-# Include API routers
-app.include_router(api_router, prefix=settings.API_V1_STR)
+def __getattr__(name: str):
+    # `uvicorn app.main:app` keeps working, but the app is only built when first
+    # asked for; `uvicorn --factory app.main:create_app` builds it explicitly
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
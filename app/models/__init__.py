@@ -1,2 +1,6 @@
 from .user import User
 from .task import Task
+from .task_counter import TaskCounter
+from .task_archive import ArchivedTask
+from .job import Job
+from .token import RefreshToken, RevokedToken
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, DateTime, Enum, Index, Integer, String, Text
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+JOB_STATUSES = ('pending', 'dead')
+
+class Job(Base):
+    """
+    Outbox of side effects, written in the same transaction as the change that
+    causes them and run after commit by the job workers (app.core.jobs).
+    Finished jobs are deleted; jobs out of attempts stay behind as 'dead'.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Claiming: WHERE status = 'pending' AND run_after <= ? ORDER BY run_after
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+        # Ids double as delivery ids, so SQLite must not reuse those of deleted jobs
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50), nullable=False)
+    # JSON document handed to the job's handler
+    payload = Column(Text, nullable=False)
+    status = Column(Enum(*JOB_STATUSES, name='job_status'), nullable=False, default='pending')
+    attempts = Column(Integer, nullable=False, default=0)
+    # Not claimable before this (naive UTC): backoff after failures, lease while running
+    run_after = Column(DateTime, nullable=False)
+    last_error = Column(String(255), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,17 +1,35 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Enum
+from sqlalchemy import Boolean, Column, DDL, ForeignKey, Integer, String, DateTime, Enum, Index, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base
 
+TASK_STATUSES = ('pending', 'in_progress', 'completed')
+
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Serves the staff listing: WHERE assignee_id = ? AND id > ? ORDER BY id
+        Index("ix_tasks_assignee_id_id", "assignee_id", "id"),
+        # Filtered listings, all paged by id
+        Index("ix_tasks_status_id", "status", "id"),
+        Index("ix_tasks_assignee_id_status_id", "assignee_id", "status", "id"),
+        Index("ix_tasks_assigned_by_id_id", "assigned_by_id", "id"),
+        Index("ix_tasks_created_at", "created_at"),
+        Index("ix_tasks_updated_at", "updated_at"),
+        # Full-text search (`q`); SQLite uses the tasks_fts FTS5 table declared below
+        Index(
+            "ix_tasks_title_description_fulltext", "title", "description", mysql_prefix="FULLTEXT"
+        ).ddl_if(dialect="mysql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(100), index=True)
-    description = Column(String(255), index=True, nullable=True)
-    status = Column(Enum('pending', 'in_progress', 'completed', name='task_status'), default='pending', nullable=False)
+    description = Column(String(255), nullable=True)
+    status = Column(Enum(*TASK_STATUSES, name='task_status'), default='pending', nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Optimistic concurrency: every UPDATE is conditional on the version it read
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     # Foreign key link back to the User table
     assignee_id = Column(Integer, ForeignKey("users.id"))
@@ -20,3 +38,30 @@ class Task(Base):
     # Relationship to user
     assignee = relationship("User", back_populates="tasks_assigned_to_me", foreign_keys=[assignee_id])
     assigned_by = relationship("User", back_populates="tasks_assigned_by_me", foreign_keys=[assigned_by_id])
+
+    # crud_task sets created_at/updated_at itself (in UTC), so a write never has
+    # to read server-generated values back (MySQL has no RETURNING)
+    __mapper_args__ = {"version_id_col": version}
+
+
+# SQLite stand-in for the MySQL FULLTEXT index: an external-content FTS5 table
+# kept in sync with `tasks` by triggers.
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+    "title, description, content='tasks', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+    "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+)
+
+for statement in SQLITE_FTS_DDL:
+    event.listen(Task.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(
+    Task.__table__, "before_drop", DDL("DROP TABLE IF EXISTS tasks_fts").execute_if(dialect="sqlite")
+)
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, DateTime, Enum, Index, Integer, String
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+from app.models.task import TASK_STATUSES
+
+class ArchivedTask(Base):
+    """
+    Completed tasks moved out of `tasks` by the archiver (app.core.archiver).
+    Rows keep their original id and columns; reads only include them on request.
+    """
+    __tablename__ = "tasks_archive"
+    __table_args__ = (
+        Index("ix_tasks_archive_assignee_id_id", "assignee_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String(100))
+    description = Column(String(255), nullable=True)
+    status = Column(Enum(*TASK_STATUSES, name='task_status'), nullable=False)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    version = Column(Integer, nullable=False)
+    assignee_id = Column(Integer)
+    assigned_by_id = Column(Integer)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String
+from app.db.base_class import Base
+
+class TaskCounter(Base):
+    """Task counts per (status, assignee), maintained by crud_task in the same transaction as each write."""
+    __tablename__ = "task_counters"
+
+    status = Column(String(20), primary_key=True)
+    # Tasks without an assignee are counted under 0
+    assignee_id = Column(Integer, primary_key=True, autoincrement=False)
+    count = Column(Integer, nullable=False, default=0)
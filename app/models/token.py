@@ -0,0 +1,45 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class RefreshToken(Base):
+    """
+    Long-lived refresh tokens, stored as SHA-256 digests. Each use rotates the
+    token: the row is marked used and a new one joins the same family. Using a
+    token twice revokes its whole family.
+    """
+    __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        Index("ix_refresh_tokens_family_id", "family_id"),
+        Index("ix_refresh_tokens_expires_at", "expires_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    token_hash = Column(String(64), nullable=False, unique=True)
+    family_id = Column(String(32), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # The access token issued together with this refresh token, revoked with the family
+    access_jti = Column(String(32), nullable=True)
+    access_expires_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Naive UTC, like the other timestamps compared in Python
+    expires_at = Column(DateTime, nullable=False)
+    used_at = Column(DateTime, nullable=True)
+    revoked_at = Column(DateTime, nullable=True)
+
+class RevokedToken(Base):
+    """
+    Revoked access tokens by `jti`, kept until they would have expired anyway.
+    Workers mirror this table in an in-memory filter (app.core.revocation);
+    they sync by revoked_at, re-reading a trailing margin for late commits.
+    """
+    __tablename__ = "revoked_tokens"
+    __table_args__ = (
+        # SQLite must not reuse the ids of purged rows
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    jti = Column(String(32), nullable=False, unique=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
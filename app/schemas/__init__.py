@@ -1,3 +1,5 @@
-from .user import UserBase, UserCreate, UserResponse
-from .task import TaskBase, TaskCreate, TaskUpdate, TaskResponse
-from .token import Token, TokenPayload
+from .user import UserBase, UserCreate, UserResponse, Principal
+from .task import TaskBase, TaskCreate, TaskUpdate, TaskResponse, TaskUserSummary, TaskFilter, TaskBulkUpdate, TaskBulkResult, TaskAssigneeStats, TaskStats, TaskImportError, TaskImportResult
+from .token import Token, TokenPayload, RefreshTokenRequest, LogoutRequest
+from .admin import PoolStats, JobQueueStats
+from .batch import BatchRequestItem, BatchRequest, BatchResponseItem, BatchResponse
@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+from typing import Optional
+
+class PoolStats(BaseModel):
+    pool_class: str
+    # Configured limits (None for pools without them, e.g. in-memory SQLite)
+    pool_size: Optional[int] = None
+    max_overflow: Optional[int] = None
+    timeout: Optional[float] = None
+    pre_ping: str
+    # Live usage
+    checked_out: Optional[int] = None
+    checked_in: Optional[int] = None
+    overflow: Optional[int] = None
+    # Checkouts so far and the total time they spent waiting for a connection
+    checkouts: int
+    checkout_wait_seconds: float
+    threadpool_tokens: int
+    threadpool_busy: int
+    workers: int
+    # Connections all workers can open with this configuration
+    max_connections_all_workers: Optional[int] = None
+
+class JobQueueStats(BaseModel):
+    pending: int
+    # Pending jobs whose run_after has passed, i.e. waiting for a worker
+    due: int
+    dead: int
+    oldest_due_seconds: Optional[float] = None
+    # Job worker threads in the process serving this request
+    workers: int
@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+class BatchRequestItem(BaseModel):
+    method: str = "GET"
+    # Path under /api/v1, with any query string, e.g. "/tasks/?limit=20"
+    path: str = Field(pattern=r"^/")
+    # JSON body for POST/PUT/PATCH
+    body: Optional[Any] = None
+    # Extra headers such as If-None-Match; Authorization always comes from the batch
+    headers: Dict[str, str] = {}
+
+class BatchRequest(BaseModel):
+    requests: List[BatchRequestItem] = Field(min_length=1)
+
+class BatchResponseItem(BaseModel):
+    status: int
+    headers: Dict[str, str]
+    body: Optional[Any] = None
+
+class BatchResponse(BaseModel):
+    responses: List[BatchResponseItem]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 class TaskBase(BaseModel):
@@ -15,6 +15,8 @@ class TaskUpdate(BaseModel):
     description: Optional[str] = None
     status: Optional[str] = None
     assignee_id: Optional[int] = None
+    # The version the client last read; a mismatch is rejected with 409
+    version: Optional[int] = None
 
 class TaskResponse(TaskBase):
     id: int
@@ -22,6 +24,58 @@ class TaskResponse(TaskBase):
     assigned_by_id: int
     created_at: datetime
     updated_at: Optional[datetime] = None
+    version: int = 1
 
     class Config:
         from_attributes = True
+
+class TaskUserSummary(BaseModel):
+    """A user as embedded by `expand=assignee,assigned_by`."""
+    id: int
+    custom_username: str
+    email: str
+
+    class Config:
+        from_attributes = True
+
+class TaskFilter(BaseModel):
+    status: Optional[str] = None
+    assignee_id: Optional[int] = None
+    assigned_by_id: Optional[int] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    updated_after: Optional[datetime] = None
+    updated_before: Optional[datetime] = None
+    # Full-text search over title and description
+    q: Optional[str] = None
+
+class TaskBulkUpdate(TaskUpdate):
+    id: int
+
+class TaskBulkResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    ok: bool
+    error: Optional[str] = None
+
+class TaskAssigneeStats(BaseModel):
+    assignee_id: int
+    total: int
+    by_status: Dict[str, int]
+
+class TaskStats(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+    by_assignee: List[TaskAssigneeStats]
+
+class TaskImportError(BaseModel):
+    row: int
+    error: str
+
+class TaskImportResult(BaseModel):
+    rows: int
+    inserted: int
+    failed: int
+    chunks: int
+    errors: List[TaskImportError]
+    errors_truncated: bool = False
@@ -4,6 +4,21 @@ from pydantic import BaseModel
 class Token(BaseModel):
     access_token: str
     token_type: str
+    # Exchange at /login/refresh-token for a new pair; valid once
+    refresh_token: Optional[str] = None
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+class LogoutRequest(BaseModel):
+    # Also end the session this refresh token belongs to
+    refresh_token: Optional[str] = None
 
 class TokenPayload(BaseModel):
     sub: Optional[int] = None
+    # Only present when settings.TOKEN_EMBED_CLAIMS is enabled
+    role: Optional[str] = None
+    active: Optional[bool] = None
+    # Token id and expiry (seconds since the epoch), used for revocation
+    jti: Optional[str] = None
+    exp: Optional[int] = None
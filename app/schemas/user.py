@@ -19,3 +19,17 @@ class UserResponse(UserBase):
     
     class Config:
         from_attributes = True
+
+class Principal(BaseModel):
+    """Detached snapshot of the authenticated user, safe to cache across requests."""
+    id: int
+    role: str
+    is_active: bool = True
+    # Not available when the principal is built from token claims alone
+    custom_username: Optional[str] = None
+    email: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+        frozen = True
@@ -0,0 +1,333 @@
+"""
+Reproducible load test and micro-benchmarks.
+
+Starts the app in-process against a file-backed SQLite database, seeds a
+deterministic dataset, drives a mixed workload through the ASGI interface and
+reports throughput and latency percentiles per operation. Results are compared
+with a stored baseline; the exit status is 1 when any operation regresses.
+
+    pipenv run python -m benchmarks.run                     # run and compare
+    pipenv run python -m benchmarks.run --save-baseline     # record a new baseline
+
+Baselines are machine specific: record one on the machine that runs the check.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import timeit
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, List
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+
+# Relative share of each operation in the mixed workload
+WORKLOAD = {
+    "login": 2,
+    "list_tasks_admin": 25,
+    "list_tasks_staff": 30,
+    "read_task": 15,
+    "create_task": 12,
+    "update_task": 11,
+    "delete_task": 5,
+}
+
+PASSWORD = "benchmark-password"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=50, help="staff users to seed (plus one admin)")
+    parser.add_argument("--tasks", type=int, default=20000, help="tasks to seed")
+    parser.add_argument("--requests", type=int, default=2000, help="requests in the mixed workload")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight at once")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--db", help="SQLite file to use (default: a fresh temporary file)")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25,
+        help="allowed slowdown of p95 latency / micro timings versus the baseline (0.25 = 25%%)",
+    )
+    parser.add_argument("--skip-load", action="store_true")
+    parser.add_argument("--skip-micro", action="store_true")
+    return parser.parse_args()
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    # Must run before anything under app/ is imported: settings are read at import time
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="tms-bench-"), "bench.sqlite")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+    # Keep logins representative but cheap enough to finish quickly
+    os.environ.setdefault("BCRYPT_ROUNDS", "8")
+    os.environ.setdefault("N_PLUS_ONE_THRESHOLD", "0")
+    # Every simulated client shares one address; don't let the login throttle kick in
+    os.environ.setdefault("LOGIN_IP_LIMIT", "1000000")
+
+
+def seed(args: argparse.Namespace) -> dict:
+    from sqlalchemy import insert
+
+    from app.core.security import get_password_hash
+    from app.crud import crud_task_stats
+    from app.db import schema
+    from app.db.session import SessionLocal, engine
+    from app.models import Task, User
+
+    schema.upgrade(engine)
+    rng = random.Random(args.seed)
+    hashed = get_password_hash(PASSWORD)
+    db = SessionLocal()
+    try:
+        users = [{
+            "email": "admin@bench.local", "custom_username": "admin",
+            "hashed_password": hashed, "role": "admin", "is_active": True,
+        }] + [{
+            "email": f"staff{i}@bench.local", "custom_username": f"staff{i}",
+            "hashed_password": hashed, "role": "staff", "is_active": True,
+        } for i in range(args.users)]
+        db.execute(insert(User), users)
+        staff_ids = list(range(2, args.users + 2))
+        for start in range(0, args.tasks, 1000):
+            db.execute(insert(Task), [{
+                "title": f"Task {n}",
+                "description": f"Seeded task {n} for benchmarking",
+                "status": rng.choice(("pending", "in_progress", "completed")),
+                "assignee_id": rng.choice(staff_ids),
+                "assigned_by_id": 1,
+            } for n in range(start, min(start + 1000, args.tasks))])
+        db.commit()
+        crud_task_stats.rebuild(db)
+    finally:
+        db.close()
+    return {"admin_id": 1, "staff_ids": staff_ids}
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_load(args: argparse.Namespace, dataset: dict) -> Dict[str, dict]:
+    import httpx
+
+    from app.main import app
+
+    rng = random.Random(args.seed)
+    api = "/api/v1"
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login(email: str) -> dict:
+            response = await client.post(
+                f"{api}/login/access-token", data={"username": email, "password": PASSWORD}
+            )
+            response.raise_for_status()
+            return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        admin = await login("admin@bench.local")
+        staff = {
+            user_id: await login(f"staff{user_id - 2}@bench.local")
+            for user_id in dataset["staff_ids"][:10]
+        }
+        created: List[int] = []
+
+        async def op_login():
+            return await client.post(
+                f"{api}/login/access-token",
+                data={"username": f"staff{rng.randrange(len(staff))}@bench.local", "password": PASSWORD},
+            )
+
+        async def op_list_tasks_admin():
+            return await client.get(f"{api}/tasks/", params={"limit": 100}, headers=admin)
+
+        async def op_list_tasks_staff():
+            return await client.get(f"{api}/tasks/", params={"limit": 100}, headers=rng.choice(list(staff.values())))
+
+        async def op_read_task():
+            return await client.get(f"{api}/tasks/{rng.randint(1, args.tasks)}", headers=admin)
+
+        async def op_create_task():
+            response = await client.post(f"{api}/tasks/", headers=admin, json={
+                "title": "Benchmark task",
+                "description": "Created during the benchmark",
+                "assignee_id": rng.choice(dataset["staff_ids"]),
+            })
+            if response.status_code == 201:
+                created.append(response.json()["id"])
+            return response
+
+        async def op_update_task():
+            task_id = rng.randint(1, args.tasks)
+            return await client.put(
+                f"{api}/tasks/{task_id}", headers=admin,
+                json={"status": rng.choice(("pending", "in_progress", "completed"))},
+            )
+
+        async def op_delete_task():
+            if not created:
+                return await op_create_task()
+            return await client.delete(f"{api}/tasks/{created.pop()}", headers=admin)
+
+        operations: Dict[str, Callable] = {
+            "login": op_login,
+            "list_tasks_admin": op_list_tasks_admin,
+            "list_tasks_staff": op_list_tasks_staff,
+            "read_task": op_read_task,
+            "create_task": op_create_task,
+            "update_task": op_update_task,
+            "delete_task": op_delete_task,
+        }
+        schedule = rng.choices(list(WORKLOAD), weights=list(WORKLOAD.values()), k=args.requests)
+        queue: asyncio.Queue = asyncio.Queue()
+        for name in schedule:
+            queue.put_nowait(name)
+
+        async def worker():
+            while not queue.empty():
+                name = queue.get_nowait()
+                start = time.perf_counter()
+                try:
+                    response = await operations[name]()
+                    # 404: deleted meanwhile; 409: a concurrent update of the same task won
+                    failed = response.status_code >= 400 and response.status_code not in (404, 409)
+                except Exception:
+                    failed = True
+                latencies[name].append(time.perf_counter() - start)
+                if failed:
+                    errors[name] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    results = {}
+    for name in WORKLOAD:
+        values = sorted(latencies.get(name, []))
+        results[name] = {
+            "count": len(values),
+            "errors": errors.get(name, 0),
+            "rps": round(len(values) / elapsed, 1),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+        }
+    results["_total"] = {"count": len(schedule), "rps": round(len(schedule) / elapsed, 1)}
+    return results
+
+
+def run_micro(args: argparse.Namespace) -> Dict[str, dict]:
+    """Hot paths timed in isolation, in microseconds per call (best of 5 repeats)."""
+    from app.api import deps
+    from app.core import security
+    from app.core.serialization import TASK_FIELDS, dump_many
+    from app.crud import crud_task
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        rows = crud_task.get_page_rows(db, limit=100)
+        token = security.create_access_token(2)
+        cases = {
+            "crud_task.get_page_rows[100]": lambda: crud_task.get_page_rows(db, limit=100),
+            "crud_task.get_page_rows[staff,100]": lambda: crud_task.get_page_rows(db, limit=100, assignee_id=2),
+            "crud_task.get_page_fingerprint[100]": lambda: crud_task.get_page_fingerprint(db, limit=100),
+            "serialization.dump_many[100]": lambda: dump_many(rows, TASK_FIELDS),
+            "deps.get_token_payload": lambda: deps.get_token_payload(token),
+        }
+        results = {}
+        for name, case in cases.items():
+            number = 200
+            best = min(timeit.repeat(case, number=number, repeat=5)) / number
+            results[name] = {"us": round(best * 1e6, 1)}
+        return results
+    finally:
+        db.close()
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    regressions = []
+    for name, current in results.get("load", {}).items():
+        previous = baseline.get("load", {}).get(name)
+        if not previous or "p95_ms" not in current:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"load {name}: p95 {current['p95_ms']}ms vs baseline {previous['p95_ms']}ms")
+        if current["errors"] > previous.get("errors", 0):
+            regressions.append(f"load {name}: {current['errors']} errors vs baseline {previous.get('errors', 0)}")
+    for name, current in results.get("micro", {}).items():
+        previous = baseline.get("micro", {}).get(name)
+        if previous and current["us"] > previous["us"] * (1 + tolerance):
+            regressions.append(f"micro {name}: {current['us']}us vs baseline {previous['us']}us")
+    return regressions
+
+
+def print_report(results: dict) -> None:
+    load = results.get("load")
+    if load:
+        print(f"{'operation':<22}{'count':>7}{'errors':>8}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for name, row in load.items():
+            if name == "_total":
+                continue
+            print(f"{name:<22}{row['count']:>7}{row['errors']:>8}{row['rps']:>9}"
+                  f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}")
+        print(f"{'total':<22}{load['_total']['count']:>7}{'':>8}{load['_total']['rps']:>9}")
+    micro = results.get("micro")
+    if micro:
+        print()
+        for name, row in micro.items():
+            print(f"{name:<40}{row['us']:>10} us")
+
+
+def main() -> None:
+    args = parse_args()
+    configure_environment(args)
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+    dataset = seed(args)
+    results: dict = {
+        "config": {
+            "users": args.users, "tasks": args.tasks, "requests": args.requests,
+            "concurrency": args.concurrency, "seed": args.seed,
+            "bcrypt_rounds": int(os.environ["BCRYPT_ROUNDS"]),
+        }
+    }
+    if not args.skip_load:
+        results["load"] = asyncio.run(run_load(args, dataset))
+    if not args.skip_micro:
+        results["micro"] = run_micro(args)
+    print_report(results)
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("config") != results["config"]:
+        print("\nWarning: baseline was recorded with a different configuration")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\nRegressions:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Shared fixtures. Settings are read when app.core.config is imported, so the
+environment is set up here first: a throwaway SQLite primary, cheap inline
+bcrypt, and no background workers or cross-request caches whose state
+would leak from one test into the next.
+"""
+import os
+import tempfile
+
+DB_DIR = tempfile.mkdtemp(prefix="task-api-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{DB_DIR}/primary.sqlite",
+    "DATABASE_REPLICA_URLS": "",
+    "SECRET_KEY": "tests-secret-key-" + "x" * 32,
+    "PASSWORD_HASH_WORKERS": "0",
+    "BCRYPT_ROUNDS": "4",
+    "LOGIN_IP_LIMIT": "1000000",
+    "RESPONSE_CACHE_ENABLED": "false",
+    "JOBS_WORKERS": "0",
+})
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.crud import crud_user  # noqa: E402
+from app.db import schema  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.session import engine  # noqa: E402
+from app.main import create_app  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    schema.upgrade(engine)
+    yield engine
+
+
+@pytest.fixture(autouse=True)
+def empty_tables(database):
+    yield
+    with database.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+    crud_user.principal_cache.clear()
+
+
+@pytest.fixture(scope="session")
+def client(database):
+    with TestClient(create_app()) as client:
+        yield client
+
+
+@pytest.fixture
+def statements():
+    """SQL statements run against the primary, recorded while the test runs."""
+    recorded = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        recorded.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield recorded
+    event.remove(engine, "before_cursor_execute", record)
@@ -0,0 +1,158 @@
+"""The async stack: AsyncSession on aiosqlite, the async CRUD modules and async dependencies."""
+import time
+from typing import List
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+
+from app import schemas
+from app.api import deps
+from app.core import ratelimit, security
+from app.crud import crud_task, crud_task_async, crud_task_stats, crud_user, crud_user_async
+from app.db.session import get_async_engine
+from app.main import create_app
+from app.schemas.task import TaskBulkUpdate, TaskCreate, TaskUpdate
+from app.schemas.user import UserCreate
+from tests.utils import API, PASSWORD
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db():
+    sessions = deps.get_async_db()
+    yield await sessions.__anext__()
+    await sessions.aclose()
+    # Pooled aiosqlite connections belong to this test's event loop
+    await get_async_engine().dispose()
+
+
+async def new_user(db, name: str, role: str = "staff"):
+    return await crud_user_async.create_user(db, UserCreate(
+        custom_username=name, email=f"{name}@example.com", password=PASSWORD, role=role,
+    ))
+
+
+async def test_create_and_authenticate_user(db):
+    user = await new_user(db, "alice")
+
+    assert (await crud_user_async.get_user_by_email(db, "alice@example.com")).id == user.id
+    assert (await crud_user_async.get_user_by_username(db, "alice")).id == user.id
+    assert (await crud_user_async.authenticate(db, "alice@example.com", PASSWORD)).id == user.id
+    assert await crud_user_async.authenticate(db, "alice@example.com", "wrong") is None
+    assert await crud_user_async.authenticate(db, "nobody@example.com", PASSWORD) is None
+    principal = await crud_user_async.get_principal(db, user.id)
+    assert (principal.id, principal.role, principal.is_active) == (user.id, "staff", True)
+
+
+async def test_unknown_emails_are_delayed_and_cached_like_sync_logins(db, monkeypatch):
+    store = ratelimit.MemoryStore()
+    monkeypatch.setattr(crud_user, "login_store", store)
+    monkeypatch.setattr(crud_user, "NEGATIVE_CACHE_ENABLED", True)
+    monkeypatch.setattr(crud_user, "_verify_seconds", 0.05)
+
+    started = time.perf_counter()
+    assert await crud_user_async.authenticate(db, "new@example.com", PASSWORD) is None
+    assert time.perf_counter() - started >= 0.05
+    assert store.get("unknown-email:new@example.com") is not None
+
+    # Registering through the async stack clears the entry like a sync registration
+    await new_user(db, "new")
+    assert store.get("unknown-email:new@example.com") is None
+    assert (await crud_user_async.authenticate(db, "new@example.com", PASSWORD)) is not None
+
+
+async def test_users_page_by_cursor(db):
+    ids = [(await new_user(db, f"user{index}")).id for index in range(5)]
+
+    first = await crud_user_async.get_users(db, limit=2)
+    rest = await crud_user_async.get_users(db, limit=10, after_id=first[-1].id)
+    assert [user.id for user in first + list(rest)] == ids
+
+
+async def test_task_writes_keep_counters_and_versions(db):
+    admin, staff = await new_user(db, "admin", "admin"), await new_user(db, "staff")
+
+    task = await crud_task_async.create_assigned_task(
+        db, TaskCreate(title="Write tests", status="pending", assignee_id=staff.id), admin.id
+    )
+    assert (task.version, task.assigned_by_id, task.updated_at) == (1, admin.id, None)
+    task = await crud_task_async.update_task(db, task, TaskUpdate(status="completed", version=1))
+    assert (task.status, task.version) == ("completed", 2)
+    assert task.updated_at is not None
+    with pytest.raises(crud_task.VersionConflict):
+        await crud_task_async.update_task(db, task, TaskUpdate(status="pending", version=1))
+
+    stats = await db.run_sync(crud_task_stats.get_stats)
+    assert (stats.total, stats.by_status) == (1, {"completed": 1})
+    assert (await crud_task_async.remove_task(db, task.id)).id == task.id
+    assert await crud_task_async.get_task(db, task.id) is None
+    assert (await db.run_sync(crud_task_stats.get_stats)).total == 0
+
+
+async def test_bulk_writes_and_listings(db):
+    admin, staff = await new_user(db, "admin", "admin"), await new_user(db, "staff")
+    results = await crud_task_async.create_bulk(db, [
+        TaskCreate(title=f"Task {index}", status="pending", assignee_id=assignee.id)
+        for index, assignee in enumerate((staff, admin, staff))
+    ], admin.id)
+    first, _, third = [result.id for result in results]
+
+    updated = await crud_task_async.update_bulk(db, [
+        TaskBulkUpdate(id=first, status="in_progress"), TaskBulkUpdate(id=first + 100, status="completed"),
+    ])
+    assert [(result.ok, result.error) for result in updated] == [(True, None), (False, "Task not found")]
+    assert [task.id for task in await crud_task_async.get_multi_by_assignee(db, staff.id)] == [first, third]
+    page = await crud_task_async.get_multi(db, limit=2, after_id=first)
+    assert [task.title for task in page] == ["Task 1", "Task 2"]
+    assert (await db.run_sync(crud_task_stats.get_stats)).by_status == {"in_progress": 1, "pending": 2}
+
+
+@pytest.fixture
+def async_app() -> FastAPI:
+    """The API plus routes built on the async dependencies, which no endpoint uses yet."""
+    app = create_app()
+
+    @app.get("/async/me", response_model=schemas.Principal)
+    async def read_me(user: schemas.Principal = Depends(deps.get_current_user_async)):
+        return user
+
+    @app.get("/async/tasks", response_model=List[schemas.TaskResponse])
+    async def read_tasks(
+        db=Depends(deps.get_async_db), admin: schemas.Principal = Depends(deps.get_current_admin_async)
+    ):
+        return await crud_task_async.get_multi(db)
+
+    return app
+
+
+async def test_async_endpoints_over_httpx(async_app):
+    transport = httpx.ASGITransport(app=async_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for name, role in (("admin", "admin"), ("staff", "staff")):
+            response = await client.post(f"{API}/users/register", json={
+                "custom_username": name, "email": f"{name}@example.com", "password": PASSWORD, "role": role,
+            })
+            assert response.status_code == 201
+        response = await client.post(
+            f"{API}/login/access-token", data={"username": "admin@example.com", "password": PASSWORD}
+        )
+        admin = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        staff = {"Authorization": f"Bearer {security.create_access_token(2)}"}
+        created = await client.post(
+            f"{API}/tasks/", json={"title": "Async", "status": "pending", "assignee_id": 2}, headers=admin
+        )
+        assert created.status_code == 201
+
+        assert (await client.get("/async/me", headers=staff)).json()["role"] == "staff"
+        response = await client.get("/async/tasks", headers=admin)
+        assert [task["id"] for task in response.json()] == [created.json()["id"]]
+        assert (await client.get("/async/tasks", headers=staff)).status_code == 403
+        assert (await client.get("/async/me")).status_code == 401
+    await get_async_engine().dispose()
@@ -0,0 +1,125 @@
+"""POST /batch: dispatch, session sharing and the guards around it."""
+import pytest
+
+from app.api import deps
+from app.core.config import settings
+from app.crud import crud_task
+from app.db.session import SessionLocal
+from app.models.task import Task
+from tests.utils import API, auth_headers, create_task, register
+
+
+@pytest.fixture
+def admin(client):
+    user = register(client, "admin", role="admin")
+    return user, auth_headers(client, "admin")
+
+
+def batch(client, headers, *requests):
+    response = client.post(f"{API}/batch", json={"requests": list(requests)}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["responses"]
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    """Sessions opened by get_db, recorded in order."""
+    opened = []
+
+    def session_factory(**kwargs):
+        db = SessionLocal(**kwargs)
+        opened.append(db)
+        return db
+
+    monkeypatch.setattr(deps, "SessionLocal", session_factory)
+    return opened
+
+
+def test_sub_requests_are_dispatched_in_order(client, admin):
+    user, headers = admin
+    task = create_task(client, headers, user["id"], "first")
+
+    me, read, missing, listing = batch(
+        client, headers,
+        {"path": "/users/me"},
+        {"path": f"/tasks/{task['id']}?fields=title"},
+        {"path": "/tasks/999999"},
+        {"path": "/tasks/?limit=1"},
+    )
+    assert (me["status"], me["body"]["id"]) == (200, user["id"])
+    assert (read["status"], read["body"]) == (200, {"id": task["id"], "title": "first"})
+    assert read["headers"]["etag"]
+    assert missing["status"] == 404
+    assert [item["id"] for item in listing["body"]] == [task["id"]]
+
+
+def test_writes_and_following_reads_share_the_batch_session(client, admin, sessions):
+    user, headers = admin
+    task = create_task(client, headers, user["id"], "before")
+    sessions.clear()
+
+    created, updated, read = batch(
+        client, headers,
+        {"method": "POST", "path": "/tasks/", "body": {"title": "new", "assignee_id": user["id"]}},
+        {"method": "PUT", "path": f"/tasks/{task['id']}", "body": {"title": "after"}},
+        {"path": f"/tasks/{task['id']}"},
+    )
+    assert (created["status"], updated["status"], read["status"]) == (201, 200, 200)
+    # The read follows a write, so it sees it
+    assert read["body"]["title"] == "after"
+    # Only the batch's own session: the sub-requests ran on it
+    assert len(sessions) == 1
+
+
+def test_consecutive_reads_get_sessions_of_their_own(client, admin, sessions):
+    user, headers = admin
+    task = create_task(client, headers, user["id"])
+    sessions.clear()
+
+    responses = batch(client, headers, *[{"path": f"/tasks/{task['id']}"}] * 3)
+    assert [response["status"] for response in responses] == [200] * 3
+    # The batch's session, then one per parallel read
+    assert len(sessions) == 4
+    assert len(set(map(id, sessions))) == 4
+
+
+def test_a_failed_write_is_rolled_back_before_the_next_request(client, admin, monkeypatch):
+    user, headers = admin
+
+    def create_and_fail(db, obj_in, assigned_by_id):
+        db.add(Task(title="half written", status="pending", assignee_id=obj_in.assignee_id))
+        db.flush()
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(crud_task, "create_assigned_task", create_and_fail)
+    failed, created = batch(
+        client, headers,
+        {"method": "POST", "path": "/tasks/", "body": {"title": "x", "assignee_id": user["id"]}},
+        {"method": "POST", "path": "/tasks/bulk", "body": [{"title": "kept", "assignee_id": user["id"]}]},
+    )
+    assert failed["status"] == 500
+    assert created["status"] == 200
+    db = SessionLocal()
+    try:
+        assert [task.title for task in db.query(Task)] == ["kept"]
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("path", ["/batch", "/tasks/export?format=csv", "/tasks/stream", "/tasks/import/"])
+def test_streaming_and_nested_requests_cannot_be_batched(client, admin, path):
+    _, headers = admin
+    response = client.post(f"{API}/batch", json={"requests": [{"method": "GET", "path": path}]}, headers=headers)
+    assert response.status_code == 400
+    assert "cannot be batched" in response.json()["detail"]
+
+
+def test_batch_size_and_methods_are_checked(client, admin, monkeypatch):
+    _, headers = admin
+    response = client.post(
+        f"{API}/batch", json={"requests": [{"method": "TRACE", "path": "/users/me"}]}, headers=headers
+    )
+    assert response.status_code == 400
+    monkeypatch.setattr(settings, "BATCH_MAX_REQUESTS", 1)
+    response = client.post(f"{API}/batch", json={"requests": [{"path": "/users/me"}] * 2}, headers=headers)
+    assert response.status_code == 400
@@ -0,0 +1,93 @@
+"""Bulk task create and update."""
+import pytest
+
+from app.core.clock import utcnow
+from app.core.config import settings
+from app.crud import crud_task
+from app.db.session import SessionLocal
+from app.models.task import Task
+from app.schemas.task import TaskBulkUpdate, TaskCreate
+from tests.utils import API, auth_headers, create_task, register
+
+
+def test_bulk_writes_stamp_the_same_clock_as_single_writes(client):
+    user = register(client, "alice")
+    db = SessionLocal()
+    try:
+        before = utcnow()
+        [created] = crud_task.create_bulk(
+            db, [TaskCreate(title="bulk", status="pending", assignee_id=user["id"])], assigned_by_id=user["id"]
+        )
+        crud_task.update_bulk(db, [TaskBulkUpdate(id=created.id, status="completed")])
+        after = utcnow()
+        task = db.get(Task, created.id)
+        assert before <= task.created_at <= task.updated_at <= after
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def admin(client):
+    user = register(client, "admin", role="admin")
+    return user, auth_headers(client, "admin")
+
+
+def test_bulk_create_reports_every_item_and_inserts_the_valid_ones_at_once(client, admin, statements):
+    user, headers = admin
+    response = client.post(f"{API}/tasks/bulk", headers=headers, json=[
+        {"title": "a", "assignee_id": user["id"]},
+        {"title": "b", "assignee_id": 999999},
+        {"title": "c", "assignee_id": user["id"], "status": "someday"},
+        {"title": "d", "assignee_id": user["id"], "status": "completed"},
+    ])
+    assert response.status_code == 200
+    results = response.json()
+    assert [(item["index"], item["ok"], item["error"]) for item in results] == [
+        (0, True, None), (1, False, "Assignee not found"), (2, False, "Invalid status"), (3, True, None),
+    ]
+    assert sum(statement.startswith("INSERT INTO tasks ") for statement in statements) == 1
+
+    tasks = {task["id"]: task for task in client.get(f"{API}/tasks/", headers=headers).json()}
+    assert (tasks[results[0]["id"]]["title"], tasks[results[3]["id"]]["status"]) == ("a", "completed")
+    assert client.get(f"{API}/tasks/stats", headers=headers).json()["by_status"] == {"pending": 1, "completed": 1}
+
+
+def test_bulk_update_sets_each_task_its_own_values_in_one_statement(client, admin, statements):
+    user, headers = admin
+    other = register(client, "bob")
+    first, second, third = (create_task(client, headers, user["id"], title) for title in ("one", "two", "three"))
+    statements.clear()
+
+    response = client.patch(f"{API}/tasks/bulk", headers=headers, json=[
+        {"id": first["id"], "title": "one, renamed"},
+        {"id": second["id"], "status": "completed", "assignee_id": other["id"], "version": second["version"]},
+        {"id": third["id"], "title": "stale", "version": third["version"] + 1},
+        {"id": 999999, "title": "missing"},
+        {"id": first["id"], "assignee_id": 999999},
+        {"id": first["id"], "status": "someday"},
+    ])
+    assert response.status_code == 200
+    assert [(item["ok"], item["error"]) for item in response.json()] == [
+        (True, None), (True, None), (False, "Version conflict"), (False, "Task not found"),
+        (False, "Assignee not found"), (False, "Invalid status"),
+    ]
+    assert sum(statement.startswith("UPDATE tasks ") for statement in statements) == 1
+
+    tasks = {task["id"]: task for task in client.get(f"{API}/tasks/", headers=headers).json()}
+    # Fields an item doesn't name keep their values (the CASE falls back to the column)
+    assert (tasks[first["id"]]["title"], tasks[first["id"]]["status"]) == ("one, renamed", "pending")
+    assert (tasks[second["id"]]["title"], tasks[second["id"]]["status"]) == ("two", "completed")
+    assert tasks[second["id"]]["assignee_id"] == other["id"]
+    assert tasks[third["id"]]["title"] == "three"
+    assert [tasks[task["id"]]["version"] for task in (first, second, third)] == [2, 2, 1]
+    stats = client.get(f"{API}/tasks/stats", headers=headers).json()
+    assert stats["by_status"] == {"pending": 2, "completed": 1}
+
+
+def test_bulk_requests_are_limited_in_size(client, admin, monkeypatch):
+    user, headers = admin
+    monkeypatch.setattr(settings, "BULK_MAX_ITEMS", 1)
+    response = client.post(f"{API}/tasks/bulk", headers=headers, json=[
+        {"title": title, "assignee_id": user["id"]} for title in ("a", "b")
+    ])
+    assert response.status_code == 413
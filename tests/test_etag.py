@@ -0,0 +1,95 @@
+"""ETags on task reads: the cheap pre-check must agree with the full response."""
+import pytest
+from sqlalchemy import update
+
+from app.db.session import engine
+from app.models.user import User
+from tests.utils import API, auth_headers, create_task, register
+
+
+@pytest.fixture
+def users(client):
+    admin, staff = register(client, "admin", role="admin"), register(client, "staff")
+    headers = {"admin": auth_headers(client, "admin"), "staff": auth_headers(client, "staff")}
+    for n in range(5):
+        create_task(client, headers["admin"], staff["id"] if n % 2 else admin["id"], f"Task {n}")
+    return admin, staff, headers
+
+
+def revalidate(client, url, headers, statements=None):
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    if statements is not None:
+        statements.clear()
+    return etag, client.get(url, headers={**headers, "If-None-Match": etag})
+
+
+@pytest.mark.parametrize("who,query", [
+    ("admin", "limit=2"),
+    ("admin", "limit=2&skip=1"),
+    ("admin", "status=pending&q=Task"),
+    ("admin", "fields=title,status"),
+    ("staff", "limit=10"),
+])
+def test_listing_precheck_matches_the_full_etag(client, users, statements, who, query):
+    _, _, headers = users
+    etag, response = revalidate(client, f"{API}/tasks/?{query}", headers[who], statements)
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    # Answered from the page fingerprint, without loading the rows
+    assert not any("tasks.title" in statement for statement in statements)
+
+
+def test_listing_etag_changes_with_the_page(client, users):
+    admin, _, headers = users
+    url = f"{API}/tasks/?limit=10"
+    etag, _ = revalidate(client, url, headers["admin"])
+    cursor_page = client.get(f"{API}/tasks/?limit=2", headers=headers["admin"])
+    next_url = f"{API}/tasks/?limit=2&cursor={cursor_page.headers['x-next-cursor']}"
+    assert revalidate(client, next_url, headers["admin"])[1].status_code == 304
+
+    first = client.get(url, headers=headers["admin"]).json()[0]
+    client.put(f"{API}/tasks/{first['id']}", json={"title": "renamed"}, headers=headers["admin"])
+    response = client.get(url, headers={**headers["admin"], "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_single_task_precheck_matches_the_full_etag(client, users, statements):
+    admin, staff, headers = users
+    task = create_task(client, headers["admin"], staff["id"], "Mine")
+    for query in ("", "?fields=title"):
+        url = f"{API}/tasks/{task['id']}{query}"
+        etag, response = revalidate(client, url, headers["staff"], statements)
+        assert (response.status_code, response.headers["etag"]) == (304, etag)
+        assert not any("tasks.title" in statement for statement in statements)
+    # Weak comparison, and one ETag per field selection
+    assert client.get(url, headers={**headers["staff"], "If-None-Match": f"W/{etag}"}).status_code == 304
+    assert client.get(f"{API}/tasks/{task['id']}", headers={**headers["staff"], "If-None-Match": etag}).status_code == 200
+
+    client.put(f"{API}/tasks/{task['id']}", json={"status": "completed"}, headers=headers["admin"])
+    response = client.get(url, headers={**headers["staff"], "If-None-Match": etag})
+    assert response.status_code == 200
+
+
+def test_precheck_still_enforces_permissions(client, users):
+    admin, _, headers = users
+    task = create_task(client, headers["admin"], admin["id"], "Not yours")
+    etag = client.get(f"{API}/tasks/{task['id']}", headers=headers["admin"]).headers["etag"]
+    response = client.get(f"{API}/tasks/{task['id']}", headers={**headers["staff"], "If-None-Match": etag})
+    assert response.status_code == 400
+    response = client.get(f"{API}/tasks/999999", headers={**headers["staff"], "If-None-Match": etag})
+    assert response.status_code == 404
+
+
+def test_expanded_reads_revalidate_on_the_full_body(client, users):
+    admin, _, headers = users
+    task = create_task(client, headers["admin"], admin["id"])
+    for url in (f"{API}/tasks/{task['id']}?expand=assignee", f"{API}/tasks/?expand=assignee"):
+        etag, response = revalidate(client, url, headers["admin"])
+        assert response.status_code == 304
+    # Renaming an embedded user leaves task versions alone but changes the expanded body
+    with engine.begin() as connection:
+        connection.execute(update(User).where(User.id == admin["id"]).values(custom_username="boss"))
+    assert client.get(url, headers={**headers["admin"], "If-None-Match": etag}).status_code == 200
@@ -0,0 +1,76 @@
+"""Sparse fieldsets (`fields=`) and embedded users (`expand=`) on task reads."""
+import pytest
+
+from tests.utils import API, auth_headers, create_task, register
+
+
+@pytest.fixture
+def admin(client):
+    user = register(client, "admin", role="admin")
+    return user, auth_headers(client, "admin")
+
+
+def selects(statements, table):
+    return [statement for statement in statements if statement.lstrip().startswith("SELECT") and f"FROM {table}" in statement]
+
+
+def test_expanded_listing_batches_the_user_lookups(client, admin, statements):
+    user, headers = admin
+    assignees = [register(client, f"staff{n}")["id"] for n in range(4)]
+    counts = []
+    for n in range(12):
+        create_task(client, headers, assignees[n % len(assignees)], f"Task {n}")
+        if n in (1, 11):
+            statements.clear()
+            response = client.get(f"{API}/tasks/?expand=assignee,assigned_by", headers=headers)
+            assert response.status_code == 200
+            counts.append((len(selects(statements, "tasks")), len(selects(statements, "users"))))
+
+    # One SELECT of the page and one per expansion, however many tasks and users
+    assert counts == [(1, 2), (1, 2)]
+    task = response.json()[-1]
+    assert task["assignee"] == {"id": task["assignee_id"], "custom_username": "staff3", "email": "staff3@example.com"}
+    assert task["assigned_by"]["id"] == user["id"]
+
+
+def test_fields_restrict_the_columns_selected(client, admin, statements):
+    user, headers = admin
+    create_task(client, headers, user["id"])
+    statements.clear()
+
+    response = client.get(f"{API}/tasks/?fields=title", headers=headers)
+    assert response.json() == [{"id": response.json()[0]["id"], "title": "Task"}]
+    (query,) = selects(statements, "tasks")
+    assert "tasks.title" in query
+    # The version and assignee stay for the ETag and the permission check
+    assert "tasks.version" in query and "tasks.assignee_id" in query
+    assert "tasks.description" not in query and "tasks.created_at" not in query
+
+
+def test_single_task_fields_and_expand(client, admin, statements):
+    user, headers = admin
+    task = create_task(client, headers, user["id"])
+    statements.clear()
+
+    response = client.get(f"{API}/tasks/{task['id']}?fields=status&expand=assignee", headers=headers)
+    assert response.json() == {
+        "id": task["id"],
+        "status": "pending",
+        "assignee": {"id": user["id"], "custom_username": "admin", "email": "admin@example.com"},
+    }
+    (query,) = selects(statements, "tasks")
+    assert "tasks.title" not in query
+    assert len(selects(statements, "users")) == 1
+
+
+@pytest.mark.parametrize("query", ["fields=title,owner", "expand=assignee,watchers"])
+def test_unknown_names_are_rejected(client, admin, query):
+    _, headers = admin
+    response = client.get(f"{API}/tasks/?{query}", headers=headers)
+    assert response.status_code == 400
+
+
+def test_expand_cannot_include_archived(client, admin):
+    _, headers = admin
+    response = client.get(f"{API}/tasks/?expand=assignee&include_archived=true", headers=headers)
+    assert response.status_code == 400
@@ -0,0 +1,26 @@
+"""The bcrypt process pool."""
+import pytest
+
+from app.core.hashing import HashingPoolBusy, PasswordHasher
+
+
+def test_in_flight_hashing_is_capped_below_the_request_threads():
+    hasher = PasswordHasher(workers=2, queue_size=32, rounds=4)
+    hasher.start(40)
+    assert hasher.max_in_flight == 10
+
+    hasher = PasswordHasher(workers=0, queue_size=2, rounds=4)
+    hasher.start(40)
+    assert hasher.max_in_flight == 2
+
+
+def test_workers_hash_and_shed_load():
+    hasher = PasswordHasher(workers=1, queue_size=0, rounds=4)
+    hasher.start(4)
+    try:
+        assert hasher.verify_and_update("secret", hasher.hash("secret")) == (True, None)
+        hasher._slots.acquire()
+        with pytest.raises(HashingPoolBusy):
+            hasher.hash("secret")
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,21 @@
+"""Task import from CSV/NDJSON uploads."""
+import orjson
+
+from tests.utils import API, auth_headers, register
+
+
+def test_progress_is_streamed_after_every_chunk(client):
+    user = register(client, "admin", role="admin")
+    headers = auth_headers(client, "admin")
+    rows = [{"title": f"Task {n}", "assignee_id": user["id"]} for n in range(5)] + [{"title": "x", "assignee_id": 0}]
+    body = b"\n".join(orjson.dumps(row) for row in rows)
+
+    response = client.post(
+        f"{API}/tasks/import", params={"progress": "true", "chunk_size": 2}, headers=headers,
+        files={"file": ("tasks.ndjson", body, "application/x-ndjson")},
+    )
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [orjson.loads(line) for line in response.text.splitlines()]
+    assert [line["progress"]["rows"] for line in lines[:-1]] == [2, 4, 6]
+    assert lines[-1]["result"]["inserted"] == 5
+    assert lines[-1]["result"]["errors"] == [{"row": 6, "error": "Assignee not found"}]
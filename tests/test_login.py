@@ -0,0 +1,55 @@
+"""Login throttling and the cache of unknown emails."""
+import pytest
+
+from app.core import ratelimit
+from app.crud import crud_user
+from app.db.session import SessionLocal
+from app.models.user import User
+from tests.utils import API, PASSWORD, register
+
+
+def login(client, email: str):
+    return client.post(f"{API}/login/access-token", data={"username": email, "password": PASSWORD})
+
+
+@pytest.fixture
+def shared_store(monkeypatch):
+    """Negative caching as with LOGIN_RATE_LIMIT_BACKEND=redis, on an in-memory stand-in."""
+    store = ratelimit.MemoryStore()
+    monkeypatch.setattr(crud_user, "login_store", store)
+    monkeypatch.setattr(crud_user, "NEGATIVE_CACHE_ENABLED", True)
+    return store
+
+
+def test_unknown_emails_are_not_cached_per_worker(client):
+    assert not crud_user.NEGATIVE_CACHE_ENABLED
+    assert login(client, "new@example.com").status_code == 400
+    assert ratelimit.store.get("unknown-email:new@example.com") is None
+
+
+def test_registration_clears_a_cached_unknown_email(client, shared_store):
+    assert login(client, "new@example.com").status_code == 400
+    assert shared_store.get("unknown-email:new@example.com") is not None
+
+    register(client, "new")
+    assert shared_store.get("unknown-email:new@example.com") is None
+    assert login(client, "new@example.com").status_code == 200
+
+
+@pytest.mark.parametrize("commit", [True, False])
+def test_cached_email_is_cleared_only_once_the_user_commits(client, shared_store, commit):
+    key = "unknown-email:new@example.com"
+    assert login(client, "new@example.com").status_code == 400
+    db = SessionLocal()
+    try:
+        db.add(User(custom_username="new", email="new@example.com", hashed_password="x", role="staff"))
+        db.flush()
+        # Not visible to other sessions yet: a login now still misses and re-caches it
+        assert shared_store.get(key) is not None
+        if commit:
+            db.commit()
+        else:
+            db.rollback()
+    finally:
+        db.close()
+    assert (shared_store.get(key) is None) is commit
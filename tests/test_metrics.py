@@ -0,0 +1,16 @@
+"""Request metrics at /metrics."""
+from tests.utils import API, auth_headers, create_task, register
+
+
+def test_requests_are_labelled_with_the_full_route_template(client):
+    user = register(client, "admin", role="admin")
+    headers = auth_headers(client, "admin")
+    task = create_task(client, headers, user["id"])
+    client.get(f"{API}/tasks/{task['id']}", headers=headers)
+    client.get(f"{API}/tasks/", headers=headers)
+    client.get(f"{API}/users/", headers=headers)
+
+    text = client.get("/metrics").text
+    for route in (f"{API}/tasks/{{task_id}}", f"{API}/tasks/", f"{API}/users/"):
+        assert f'http_requests_total{{method="GET",route="{route}",status="200"}}' in text
+    assert f"{API}/tasks/{task['id']}" not in text
@@ -0,0 +1,130 @@
+"""Read-replica routing against two SQLite files: the tests' primary and a copy of it."""
+import shutil
+
+import pytest
+from sqlalchemy import create_engine, event, exc
+
+from app.api import deps
+from app.api.api_v1.endpoints import tasks
+from app.core import response_cache
+from app.db import replicas
+from app.db.session import engine
+from tests.utils import API, auth_headers, create_task, register
+
+
+@pytest.fixture
+def writers(monkeypatch):
+    recent = replicas.MemoryWriters(ttl=60)
+    monkeypatch.setattr(replicas, "recent_writers", recent)
+    return recent
+
+
+def use_replicas(monkeypatch, *urls) -> replicas.ReplicaSet:
+    replica_set = replicas.ReplicaSet(list(urls), retry_after=60)
+    monkeypatch.setattr(deps, "replicas", replica_set)
+    return replica_set
+
+
+@pytest.fixture
+def admin(client):
+    user = register(client, "admin", role="admin")
+    return user, auth_headers(client, "admin")
+
+
+def snapshot(tmp_path) -> str:
+    """Copy the primary into a replica file, as replication would have."""
+    path = tmp_path / "replica.sqlite"
+    shutil.copy(engine.url.database, path)
+    return f"sqlite:///{path}"
+
+
+def test_reads_go_to_the_replica(client, monkeypatch, writers, admin, tmp_path):
+    user, headers = admin
+    create_task(client, headers, user["id"], "replicated")
+    use_replicas(monkeypatch, snapshot(tmp_path))
+    # Written after the snapshot: only on the primary
+    create_task(client, headers, user["id"], "not yet replicated")
+    writers._subjects.clear()
+
+    titles = [task["title"] for task in client.get(f"{API}/tasks/", headers=headers).json()]
+    assert titles == ["replicated"]
+
+
+def test_writers_read_their_writes_from_the_primary(client, monkeypatch, writers, admin, tmp_path):
+    user, headers = admin
+    use_replicas(monkeypatch, snapshot(tmp_path))
+    create_task(client, headers, user["id"], "fresh")
+
+    assert str(user["id"]) in writers
+    titles = [task["title"] for task in client.get(f"{API}/tasks/", headers=headers).json()]
+    assert titles == ["fresh"]
+
+
+def test_writes_go_to_the_primary(client, monkeypatch, writers, admin, tmp_path):
+    user, headers = admin
+    replica_url = snapshot(tmp_path)
+    use_replicas(monkeypatch, replica_url)
+    task = create_task(client, headers, user["id"])
+
+    response = client.put(f"{API}/tasks/{task['id']}", json={"title": "renamed"}, headers=headers)
+    assert response.status_code == 200
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT title FROM tasks").scalar() == "renamed"
+    replica = create_engine(replica_url)
+    with replica.connect() as connection:
+        assert connection.exec_driver_sql("SELECT count(*) FROM tasks").scalar() == 0
+
+
+def test_picking_a_replica_does_not_connect(monkeypatch, tmp_path):
+    replica_set = use_replicas(monkeypatch, snapshot(tmp_path))
+    checkouts = []
+    event.listen(replica_set.engines[0], "checkout", lambda *args: checkouts.append(args))
+
+    assert all(replica_set.pick() is replica_set.engines[0] for _ in range(5))
+    assert checkouts == []
+
+
+def test_failed_replica_fails_over_to_the_primary(client, monkeypatch, writers, admin, tmp_path):
+    user, headers = admin
+    create_task(client, headers, user["id"])
+    replica_set = use_replicas(monkeypatch, f"sqlite:///{tmp_path}/missing/replica.sqlite")
+    writers._subjects.clear()
+
+    # The read that finds the replica down is served by the primary; it is skipped from then on
+    response = client.get(f"{API}/tasks/", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    assert replica_set.pick() is None
+    assert len(client.get(f"{API}/tasks/", headers=headers).json()) == 1
+
+
+def test_round_robin_skips_replicas_that_are_down(monkeypatch, tmp_path):
+    replica_set = use_replicas(
+        monkeypatch, snapshot(tmp_path), f"sqlite:///{tmp_path}/missing/replica.sqlite"
+    )
+    healthy, broken = replica_set.engines
+    with pytest.raises(exc.OperationalError):
+        broken.connect()
+
+    assert {replica_set.pick() for _ in range(4)} == {healthy}
+
+
+def test_pages_read_from_a_replica_are_not_cached(client, monkeypatch, writers, admin, tmp_path):
+    cache = response_cache.ResponseCache(response_cache.LocalBackend(), max_bytes=1 << 20, ttl=60)
+    monkeypatch.setattr(tasks, "response_cache", cache)
+    monkeypatch.setattr(response_cache, "response_cache", cache)
+    user, headers = admin
+    use_replicas(monkeypatch, snapshot(tmp_path))
+    create_task(client, headers, user["id"], "only on the primary")
+    writers._subjects.clear()
+
+    # The lagging replica's page must not be stored under the current table version
+    assert client.get(f"{API}/tasks/", headers=headers).json() == []
+    assert len(cache.local) == 0
+
+    # Read from the primary (the writer is sticky again): cached, and served to replica readers
+    create_task(client, headers, user["id"], "second")
+    assert len(client.get(f"{API}/tasks/", headers=headers).json()) == 2
+    assert len(cache.local) == 1
+    writers._subjects.clear()
+    assert len(client.get(f"{API}/tasks/", headers=headers).json()) == 2
@@ -0,0 +1,14 @@
+"""Choosing the response cache backend."""
+from app.core import response_cache
+from app.core.config import settings
+
+
+def test_local_backend_only_serves_a_single_worker(monkeypatch):
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_BACKEND", "local")
+
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 1)
+    assert isinstance(response_cache._cache_from_settings().backend, response_cache.LocalBackend)
+
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 4)
+    assert response_cache._cache_from_settings() is None
@@ -0,0 +1,44 @@
+"""Syncing the revoked token filter across workers."""
+from datetime import timedelta
+
+from app.core.revocation import Denylist
+from app.core.clock import utcnow
+from app.db.session import SessionLocal
+from app.models.token import RevokedToken
+
+
+def revoke(jti: str, id: int, revoked_at):
+    db = SessionLocal()
+    try:
+        db.add(RevokedToken(id=id, jti=jti, expires_at=utcnow() + timedelta(hours=1), revoked_at=revoked_at))
+        db.commit()
+    finally:
+        db.close()
+
+
+def make_denylist() -> Denylist:
+    return Denylist(
+        SessionLocal, capacity=1000, error_rate=0.001, sync_interval=60, rebuild_interval=3600, sync_margin=60
+    )
+
+
+def test_sync_picks_up_a_revocation_committed_late():
+    denylist = make_denylist()
+    now = utcnow()
+    revoke("first", id=10, revoked_at=now)
+    denylist.sync()
+    assert denylist.is_revoked("first")
+
+    # Inserted (and given its id and revoked_at) before "first", committed after it was synced
+    revoke("late", id=5, revoked_at=now - timedelta(seconds=10))
+    denylist.sync()
+    assert denylist.is_revoked("late")
+    assert denylist.size == 2
+
+
+def test_sync_does_not_recount_rows_in_the_margin():
+    denylist = make_denylist()
+    revoke("first", id=1, revoked_at=utcnow())
+    for _ in range(3):
+        denylist.sync()
+    assert denylist.size == 1
@@ -0,0 +1,32 @@
+from typing import Dict
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+
+API = settings.API_V1_STR
+PASSWORD = "correct horse"
+
+
+def register(client: TestClient, name: str, role: str = "staff") -> dict:
+    response = client.post(f"{API}/users/register", json={
+        "custom_username": name, "email": f"{name}@example.com", "password": PASSWORD, "role": role,
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def auth_headers(client: TestClient, name: str) -> Dict[str, str]:
+    response = client.post(
+        f"{API}/login/access-token", data={"username": f"{name}@example.com", "password": PASSWORD}
+    )
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def create_task(client: TestClient, headers: Dict[str, str], assignee_id: int, title: str = "Task") -> dict:
+    response = client.post(
+        f"{API}/tasks/", json={"title": title, "status": "pending", "assignee_id": assignee_id}, headers=headers
+    )
+    assert response.status_code == 201, response.text
+    return response.json()